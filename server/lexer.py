@@ -1,3 +1,5 @@
+import sys
+
 class LexerError(Exception):
     def __init__(self, message, line, column):
         self.message = message
@@ -708,7 +710,9 @@ class Lexer:
         if key in self.KEYWORDS:
             return Token(self.KEYWORDS[key], key, line, column), None
         
-        return Token(TT_IDENTIFIER, key, line, column), None
+        # Interned so every use of a name shares one string object with the
+        # symbol tables, which intern the names they declare
+        return Token(TT_IDENTIFIER, sys.intern(key), line, column), None
 
     def make_number(self):
         start_line = self.line
@@ -1,5 +1,140 @@
+import sys
+
 from lexer import Lexer
 
+# Set to True to get the analyzer's verbose trace output on stdout
+_DEBUG = False
+
+# Struct body parser: state -> (expected token, next state). State 0 is
+# "start of member or after ';'"; DATA_TYPE matches any member data type.
+DATA_TYPE = 'data_type'
+STRUCT_MEMBER_STATES = ((DATA_TYPE, 1), ('id', 2), (';', 0))
+STRUCT_MEMBER_ERRORS = (
+    "Expected a data type for struct member, got '{}'",
+    "Expected member name, got '{}'",
+    "Expected ';' after struct member, got '{}'",
+)
+
+# Fixed token shape of the main function header, with the error raised when
+# the token at that position does not match
+MAIN_SIGNATURE = ('mn', '(', ')', '{')
+MAIN_SIGNATURE_ERRORS = (
+    None,
+    "Expected '(' after 'mn'",
+    "Expected ')' after '(' in 'mn'",
+    "Expected '{{' to start main function body, got '{}'",
+)
+
+# Element token types accepted in an array initializer, per array data type
+_ARRAY_ELEM_TYPES = {
+    'nt': frozenset(('ntlit', '~ntlit', 'id')),
+    'dbl': frozenset(('dbllit', '~dbllit', 'ntlit', '~ntlit', 'id')),
+    'bln': frozenset(('true', 'false', 'blnlit', 'id')),
+    'chr': frozenset(('chrlit', 'id')),
+    'strng': frozenset(('strnglit', 'id')),
+}
+
+# Binary operator typing: operator -> category, and (category, left type,
+# right type) -> result type for every valid combination. == and != also
+# accept any two operands of the same type, which _apply_binop checks itself.
+_NUMERIC_TYPES = frozenset(('nt', 'dbl'))
+_OP_CATEGORY = {
+    '+': 'arith', '-': 'arith', '*': 'arith', '/': 'arith', '%': 'arith',
+    '&&': 'logical', '||': 'logical',
+    '==': 'eq', '!=': 'eq',
+    '<': 'rel', '>': 'rel', '<=': 'rel', '>=': 'rel',
+    '`': 'concat',
+}
+_COMBINE = {
+    ('arith', 'nt', 'nt'): 'nt',
+    ('arith', 'nt', 'dbl'): 'dbl',
+    ('arith', 'dbl', 'nt'): 'dbl',
+    ('arith', 'dbl', 'dbl'): 'dbl',
+    ('rel', 'nt', 'nt'): 'bln',
+    ('rel', 'nt', 'dbl'): 'bln',
+    ('rel', 'dbl', 'nt'): 'bln',
+    ('rel', 'dbl', 'dbl'): 'bln',
+    ('eq', 'nt', 'dbl'): 'bln',
+    ('eq', 'dbl', 'nt'): 'bln',
+    ('logical', 'bln', 'bln'): 'bln',
+    ('concat', 'strng', 'strng'): 'strng',
+}
+# Boolean literal token types
+_BLN_LITERALS = frozenset(('true', 'false', 'blnlit'))
+
+# Literal token type -> the type of the operand it denotes in an expression
+_LITERAL_OPERAND_TYPE = {
+    'ntlit': 'nt', '~ntlit': 'nt',
+    'dbllit': 'dbl', '~dbllit': 'dbl',
+    'true': 'bln', 'false': 'bln', 'blnlit': 'bln',
+    'chrlit': 'chr',
+    'strnglit': 'strng',
+}
+
+# Type given to an operand whose error was deferred by _err; it combines with
+# anything so one mistake is not reported again by every enclosing check
+ERR_TYPE = 'err'
+
+# Types an f/lsf/whl/d-whl condition may have (ERR_TYPE: already reported)
+_CONDITION_TYPES = frozenset(('bln', 'nt', ERR_TYPE))
+
+# Operators whose operand type is closed under them: both sides of that type
+# give that type back, so the result needs no _COMBINE lookup
+_CLOSED_OPS = {'&&': 'bln', '||': 'bln', '`': 'strng'}
+
+# Prefix/postfix increment and decrement
+_INCDEC_OPERATORS = frozenset(('++', '--'))
+
+# Operator after the target of an assignment statement -> how
+# analyze_assignment handles it
+_ASSIGN_OP_KIND = {
+    '++': 'incdec', '--': 'incdec',
+    '+=': 'compound', '-=': 'compound', '*=': 'compound', '/=': 'compound', '%=': 'compound',
+    '=': 'simple',
+}
+_COMPOUND_ASSIGN_OPERATORS = frozenset(op for op, kind in _ASSIGN_OP_KIND.items() if kind == 'compound')
+# Shortcut assignments allowed in a for-loop update clause. '%=' is left out:
+# the update has always been limited to stepping the loop variable with
+# + - * /, and a '%=' there is reported as an unexpected operator
+_FOR_UPDATE_ASSIGN_OPERATORS = _COMPOUND_ASSIGN_OPERATORS - {'%='}
+
+# Labels that start a switch body; a case body also ends at the switch's '}'
+_CASE_LABELS = frozenset(('cs', 'dflt'))
+_CASE_BODY_ENDERS = _CASE_LABELS | {'}'}
+
+# Small integer ids for the token kinds the array initializer and argument
+# scans compare against; every other kind shares TOK_OTHER
+TOKEN_KIND_IDS = {kind: kind_id for kind_id, kind in enumerate((
+    '(', ')', '[', ']', '{', '}', ',', ';', '=', 'id',
+    'ntlit', '~ntlit', 'dbllit', '~dbllit', 'blnlit', 'true', 'false', 'chrlit', 'strnglit',
+))}
+TOK_OTHER = len(TOKEN_KIND_IDS)
+TOK_LPAREN = TOKEN_KIND_IDS['(']
+TOK_RPAREN = TOKEN_KIND_IDS[')']
+TOK_LBRACKET = TOKEN_KIND_IDS['[']
+TOK_RBRACKET = TOKEN_KIND_IDS[']']
+TOK_LBRACE = TOKEN_KIND_IDS['{']
+TOK_RBRACE = TOKEN_KIND_IDS['}']
+TOK_COMMA = TOKEN_KIND_IDS[',']
+TOK_ID = TOKEN_KIND_IDS['id']
+
+# _ARRAY_ELEM_TYPES as bitmasks over TOKEN_KIND_IDS
+_ARRAY_ELEM_MASKS = {
+    data_type: sum(1 << TOKEN_KIND_IDS[kind] for kind in kinds)
+    for data_type, kinds in _ARRAY_ELEM_TYPES.items()
+}
+# Mask for data types without an element restriction: every bit is set
+_ANY_ELEM_MASK = -1
+
+# Closing bracket -> the opening bracket it pairs with
+_CLOSING_BRACKETS = {')': '(', ']': '[', '}': '{'}
+
+# What get_current_token/peek_next_token give for a position past the stream
+_NO_TOKEN = (None, None, None, None)
+
+# An initializer in a variable/constant declaration runs up to either of these
+DECLARATION_STOP_TOKENS = frozenset({';', ','})
+
 class SemanticError(Exception): 
     def __init__(self, message, line=None, column=None):
         super().__init__(message)
@@ -13,16 +148,29 @@ class SemanticError(Exception):
         return f"Semantic Error: {self.message}"
 
 class Symbol:
+    __slots__ = ('name', 'type', 'data_type', 'initialized', 'is_constant', 'is_array',
+                 'array_dimensions', 'array_sizes', 'line', 'column', 'initialized_members',
+                 'is_nt', 'is_function', 'static_sizes')
+
     def __init__(self, name, type, data_type=None, initialized=False, is_constant=False, 
                 is_array=False, array_dimensions=None, array_sizes=None, line=None, column=None):
         self.name = name
         self.type = type  # 'variable', 'function', 'struct'
-        self.data_type = data_type  # 'nt', 'dbl', 'bln', 'chr', 'strng'
+        # 'nt', 'dbl', 'bln', 'chr', 'strng' (or a struct name). Interned so the
+        # many comparisons against type-name literals hit the identity fast path
+        self.data_type = sys.intern(data_type) if isinstance(data_type, str) else data_type
+        # Neither type nor data_type changes after construction, so the checks
+        # the expression parser makes on every reference are precomputed
+        self.is_nt = data_type == 'nt'
+        self.is_function = type == 'function'
         self.initialized = initialized
         self.is_constant = is_constant
         self.is_array = is_array
         self.array_dimensions = array_dimensions  # 1 for 1D, 2 for 2D
         self.array_sizes = array_sizes  # [size] for 1D, [size1, size2] for 2D
+        # Per dimension: the size if it is a literal, None if it is a variable name
+        self.static_sizes = (None if array_sizes is None else
+                             tuple(size if isinstance(size, int) else None for size in array_sizes))
         self.line = line 
         self.column = column
         # New attribute to track initialized members of struct instances
@@ -42,6 +190,8 @@ class Symbol:
         return f"{self.name}: {constant}{self.type} {self.data_type}{array_info} ({status}) {location}"
 
 class FunctionSymbol(Symbol):
+    __slots__ = ('parameters', 'has_return_statement', 'body_start_index')
+
     def __init__(self, name, return_type, parameters=None, line=None, column=None):
         super().__init__(name, 'function', return_type, True, False, False, None, None, line, column)
         self.parameters = parameters or []
@@ -59,6 +209,8 @@ class FunctionSymbol(Symbol):
 
 # Add this class after FunctionSymbol
 class StructSymbol(Symbol):
+    __slots__ = ('members',)
+
     def __init__(self, name, members=None, line=None, column=None):
         super().__init__(name, 'struct', None, True, False, False, None, None, line, column)
         self.members = members or {}  # Dict of member name -> Symbol
@@ -69,42 +221,65 @@ class StructSymbol(Symbol):
         return f"{self.name}: {self.type} members: {{{member_str}}} {location}"
 
 class SymbolTable:
+    __slots__ = ('symbols', 'parent', 'scope_name', '_flat_cache', '_cache_generation',
+                 '_root', '_generation', '_cached_names')
+
     def __init__(self, parent=None, scope_name="global"):
         self.symbols = {}
         self.parent = parent
         self.scope_name = scope_name
+        # The global table at the top of this scope chain. It holds the
+        # cache-invalidation state shared by every table of one analysis.
+        self._root = parent._root if parent is not None else self
+        if parent is None:
+            # Bumped by an insert of a name that some lookup cache holds.
+            # Caches filled under an older generation may be stale (e.g. a
+            # parent scope has since declared the name), so they are dropped.
+            self._generation = 0
+            # Names cached by any table since the last bump. Inserting a name
+            # that no cache holds cannot make a cached answer wrong, so it
+            # leaves the caches alone.
+            self._cached_names = set()
+        # name -> Symbol for names already resolved from this scope,
+        # wherever in the parent chain they were found
+        self._flat_cache = {}
+        self._cache_generation = self._root._generation
 
     def insert(self, name, symbol):
         if name in self.symbols:
             return False
         self.symbols[name] = symbol
+        root = self._root
+        if name in root._cached_names:
+            root._generation += 1
+            root._cached_names.clear()
         return True
 
     def lookup(self, name):
-        # First check in current scope
-        if name in self.symbols:
-            return self.symbols[name]
-        
-        # If not found in current scope and this is a function scope,
-        # check directly in global scope (skip any intermediate scopes)
-        if self.scope_name.startswith("function "):
-            # We're in a function scope, check global scope directly
-            global_scope = None
-            
-            # Find the global scope
-            temp_scope = self
-            while temp_scope.parent:
-                temp_scope = temp_scope.parent
-            global_scope = temp_scope
-            
-            # Check in global scope
-            if name in global_scope.symbols:
-                print(f"Found '{name}' in global scope from function scope '{self.scope_name}'")
-                return global_scope.symbols[name]
-        
-        # Normal parent lookup
-        if self.parent:
-            return self.parent.lookup(name)
+        root = self._root
+        if self._cache_generation != root._generation:
+            self._flat_cache.clear()
+            self._cache_generation = root._generation
+        else:
+            symbol = self._flat_cache.get(name)
+            if symbol is not None:
+                return symbol
+        symbol = self._lookup_inner(name)
+        if symbol is not None:
+            self._flat_cache[name] = symbol
+            root._cached_names.add(name)
+        return symbol
+
+    def _lookup_inner(self, name):
+        # Walk from this scope out through its parents. Function scopes are
+        # always created directly under the global scope, so reaching global
+        # from a function needs no special case.
+        scope = self
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
         
         return None
 
@@ -122,35 +297,75 @@ class SymbolTable:
             print(f"{indent_str}  {symbol}")
 
 class SemanticAnalyzer:
-    def __init__(self):
+    def __init__(self, strict=True):
+        # strict: stop at the first error. Otherwise recoverable expression
+        # errors are collected (see _err) and analysis carries on
+        self.strict = strict
+        self._deferred_errors = []  # error strings collected by _err when not strict
         self.current_token_index = 0
         self.token_stream = []
+        self._token_kinds = []  # token types only, parallel to token_stream
+        self._kind_ids = []  # TOKEN_KIND_IDS ids, parallel to token_stream
+        self._next_tables = {}  # token type -> next-occurrence table, see _next_index_table
+        self._matching = []  # token index -> index of its matching bracket, see _compute_bracket_matches
+        self._lookup_cache = {}  # name -> Symbol for the expression being parsed, see _cached_lookup
+        self._probed_operand = None  # (start index, type, end index), see _take_probed_operand
         self.current_scope = None
+        self._function_stack = []  # names of the functions whose bodies are being analyzed, innermost last
         self.global_scope = SymbolTable(scope_name="global")
         self.function_scopes = {}  # Map function name to its SymbolTable
         
         # Define valid data types
-        self.data_types = {'nt', 'dbl', 'bln', 'chr', 'strng'}
+        self.data_types = frozenset({'nt', 'dbl', 'bln', 'chr', 'strng'})
         
-        # Define valid operators
-        self.arithmetic_operators = {'+', '-', '*', '/', '%'}
-        self.logical_operators = {'&&', '||'}
-        self.relational_operators = {'<', '>', '<=', '>=', '==', '!='}
-        self.equality_operators = {'==', '!='}  # Subset of relational that works for all types
-        self.assignment_operators = {'='}
-        self.unary_operators = {'!'}
-        self.string_concat_operator = {'`'}
+        # Define valid operators (binary operators are categorized in the
+        # module-level _OP_CATEGORY table)
+        self.assignment_operators = frozenset({'='})
+        self.unary_operators = frozenset({'!'})
         
         # Define built-in functions
-        self.built_in_functions = {'prnt', 'scan', 'len', 'npt'}
+        self.built_in_functions = frozenset({'prnt', 'scan', 'len', 'npt'})
     
         # Add struct-related keywords
-        self.struct_keywords = {'strct', 'dfstrct'}
+        self.struct_keywords = frozenset({'strct', 'dfstrct'})
+    
+        # Statement keyword -> its analyzer, shared by analyze_block_statements
+        # and _dispatch_case_statement
+        self._statement_handlers = {
+            'f': self.analyze_if_statement,
+            'whl': self.analyze_while_loop,
+            'fr': self.analyze_for_loop,
+            'd': self.analyze_do_while_loop,
+            'swtch': self.analyze_switch_statement,
+            'cnst': self.analyze_constant_declaration,
+            'dfstrct': self.analyze_struct_instantiation,
+            'prnt': self.analyze_print_statement,
+            'rtrn': self.analyze_return_in_conditional,
+        }
+        # Statements that start with an identifier, keyed by the type of the
+        # token after it
+        self._id_statement_handlers = {
+            '.': self.analyze_struct_member_access,
+            '(': self.analyze_function_call,
+            '[': self._analyze_array_access_statement,
+            '=': self.analyze_assignment,
+        }
+        # Blocks also accept increments and shortcut assignments; case bodies
+        # treat those as plain variable usage
+        self._block_id_statement_handlers = dict(self._id_statement_handlers)
+        for operator in _INCDEC_OPERATORS:
+            self._block_id_statement_handlers[operator] = self.analyze_increment_operation
+        for operator in _COMPOUND_ASSIGN_OPERATORS:
+            self._block_id_statement_handlers[operator] = self.analyze_assignment
     
         # Add these tracking flags
         self.in_loop = False
         self.in_switch = False
         self.in_case_block = False  # New flag to track if we're inside a case/default block
+        self.in_switch_case = False  # Set while analyze_if_statement_in_switch runs
+        # Set by _err when an error is recorded instead of raised; the
+        # top-level Pass 1 / Pass 2 loops stop as soon as it is True
+        self._fatal = False
 
     def print_symbol_tables(self):
         """Print all symbol tables in the current scope hierarchy, including function scopes"""
@@ -175,11 +390,15 @@ class SemanticAnalyzer:
     # --- Modified collect_declarations ---
     def collect_declarations(self):
         """First pass: Collect struct definitions and function signatures (including main)."""
-        print("Collecting declarations (Pass 1)...")
+        if _DEBUG:
+            print("Collecting declarations (Pass 1)...")
         original_index = self.current_token_index # Save entry index (usually 0)
         temp_index = 0 # Use a temporary index to scan the entire stream
+        # Start index -> index just past the declaration, for struct
+        # definitions; Pass 2 jumps over these instead of re-scanning them
+        self._skip_spans = {}
 
-        while temp_index < len(self.token_stream):
+        while temp_index < len(self.token_stream) and not self._fatal:
             # Set current_token_index temporarily for analysis functions
             self.current_token_index = temp_index
             token_type, token_value, line, column = self.get_current_token()
@@ -189,10 +408,12 @@ class SemanticAnalyzer:
                 if temp_index + 2 < len(self.token_stream):
                      name_token = self.token_stream[temp_index + 2]
                      if name_token[0] == 'id': func_name = name_token[1]
-                print(f"Pass 1: Found 'fnctn' for '{func_name}' at index {temp_index}.")
+                if _DEBUG:
+                    print(f"Pass 1: Found 'fnctn' for '{func_name}' at index {temp_index}.")
                 self.analyze_function_declaration(is_first_pass=True)
                 temp_index = self.current_token_index
-                print(f"Pass 1: After skipping '{func_name}', temp_index is now {temp_index}.")
+                if _DEBUG:
+                    print(f"Pass 1: After skipping '{func_name}', temp_index is now {temp_index}.")
                 continue
 
             elif token_type == 'strct':
@@ -200,15 +421,19 @@ class SemanticAnalyzer:
                 if temp_index + 1 < len(self.token_stream):
                      name_token = self.token_stream[temp_index + 1]
                      if name_token[0] == 'id': struct_name = name_token[1]
-                print(f"Pass 1: Found 'strct' for '{struct_name}' at index {temp_index}.")
+                if _DEBUG:
+                    print(f"Pass 1: Found 'strct' for '{struct_name}' at index {temp_index}.")
                 self.analyze_struct_declaration()
+                self._skip_spans[temp_index] = self.current_token_index
                 temp_index = self.current_token_index
-                print(f"Pass 1: After processing '{struct_name}', temp_index is now {temp_index}.")
+                if _DEBUG:
+                    print(f"Pass 1: After processing '{struct_name}', temp_index is now {temp_index}.")
                 continue
 
             # --- ADDED: Handle 'mn' signature collection in Pass 1 ---
             elif token_type == 'mn':
-                print(f"Pass 1: Found 'mn' function declaration at index {temp_index}.")
+                if _DEBUG:
+                    print(f"Pass 1: Found 'mn' function declaration at index {temp_index}.")
                 mn_line, mn_col = line, column
                 # --- Start: Skipping mn() { signature ---
                 # We need to advance self.current_token_index to find body start
@@ -246,36 +471,28 @@ class SemanticAnalyzer:
                           raise SemanticError("'mn' function can only be declared once", mn_line, mn_col)
                      else: # If 'mn' exists but isn't a function (e.g., variable)
                           raise SemanticError("Symbol 'mn' already declared with a different type", mn_line, mn_col)
-                print(f"Pass 1: Added 'mn' symbol to global scope.")
+                if _DEBUG:
+                    print(f"Pass 1: Added 'mn' symbol to global scope.")
 
                 # Create and store scope for mn
                 if "mn" not in self.function_scopes:
                      main_scope = SymbolTable(parent=self.global_scope, scope_name="function mn")
                      self.function_scopes["mn"] = main_scope
-                     print(f"Pass 1: Created scope for 'mn'.")
+                     if _DEBUG:
+                         print(f"Pass 1: Created scope for 'mn'.")
                 else:
                      # This case should ideally not happen if mn can only be declared once
-                     print(f"Warning: Scope for 'mn' already existed in self.function_scopes during Pass 1.")
+                     if _DEBUG:
+                         print(f"Warning: Scope for 'mn' already existed in self.function_scopes during Pass 1.")
                      pass # Or raise error?
 
-                # Skip body (self.current_token_index is at '{')
-                self.advance() # Past '{'
-                brace_count = 1
-                while brace_count > 0 and self.current_token_index < len(self.token_stream):
-                    t_type = self.get_current_token()[0]
-                    if t_type == '{': brace_count += 1
-                    elif t_type == '}': brace_count -= 1
-                    if brace_count > 0: self.advance() # Avoid advancing past the final '}'
-
-                # Now at final '}' or end of stream
-                if self.current_token_index < len(self.token_stream) and self.get_current_token()[0] == '}':
-                     self.advance() # Past '}'
-                else: # Reached end of stream without closing brace
-                     raise SemanticError("Unclosed body for 'mn'", line, column) # Use line/col of '{' maybe?
+                # Skip body (self.current_token_index is at '{') and its final '}'
+                self._skip_past_block("Unclosed body for 'mn'", line, column)
 
                 # Update the main loop index (temp_index) to where we ended up
                 temp_index = self.current_token_index
-                print(f"Pass 1: After skipping 'mn' body, temp_index is now {temp_index}.")
+                if _DEBUG:
+                    print(f"Pass 1: After skipping 'mn' body, temp_index is now {temp_index}.")
                 continue # Skip default temp_index increment
             # --- End 'mn' handling ---
 
@@ -284,7 +501,8 @@ class SemanticAnalyzer:
 
         # Restore the original token index before starting pass 2
         self.current_token_index = original_index
-        print("Finished collecting declarations (Pass 1).")
+        if _DEBUG:
+            print("Finished collecting declarations (Pass 1).")
                 
     def skip_function_declaration(self):
         """Skip past a function declaration and body"""
@@ -431,7 +649,8 @@ class SemanticAnalyzer:
                  else:
                      raise SemanticError(f"Symbol '{func_name}' already declared with a different type", line_name, col_name)
             else:
-                 print(f"Pass 1: Added function '{func_name}' symbol to global scope.")
+                 if _DEBUG:
+                     print(f"Pass 1: Added function '{func_name}' symbol to global scope.")
 
             # Create and store function scope
             function_scope = SymbolTable(parent=self.global_scope, scope_name=f"function {func_name}")
@@ -440,7 +659,8 @@ class SemanticAnalyzer:
                      param_line, param_col = param.line, param.column
                      raise SemanticError(f"Duplicate parameter name '{param.name}' in function '{func_name}'", param_line, param_col)
             self.function_scopes[func_name] = function_scope
-            print(f"Pass 1: Created scope for function '{func_name}'.")
+            if _DEBUG:
+                print(f"Pass 1: Created scope for function '{func_name}'.")
 
         else:
             # Pass 2: Retrieve existing symbol and scope
@@ -450,7 +670,8 @@ class SemanticAnalyzer:
             if func_name not in self.function_scopes:
                  raise SemanticError(f"Internal Error: Function scope for '{func_name}' not found during pass 2", line_name, col_name)
             function_scope = self.function_scopes[func_name]
-            print(f"Pass 2: Retrieved symbol and scope for function '{func_name}'.")
+            if _DEBUG:
+                print(f"Pass 2: Retrieved symbol and scope for function '{func_name}'.")
 
 
         # Process opening brace for function body
@@ -461,31 +682,29 @@ class SemanticAnalyzer:
         if is_first_pass:
             # Pass 1: Store body start index and skip the body
             func_symbol.body_start_index = self.current_token_index + 1 # Store index AFTER '{'
-            print(f"Pass 1: Stored body start index {func_symbol.body_start_index} for '{func_name}'. Skipping body.")
-            self.advance() # Move past '{'
-            brace_count = 1
-            while brace_count > 0 and self.current_token_index < len(self.token_stream):
-                token_type = self.get_current_token()[0]
-                if token_type == '{': brace_count += 1
-                elif token_type == '}': brace_count -= 1
-                if brace_count > 0: self.advance()
-            if self.get_current_token()[0] == '}': self.advance() # Move past the final '}'
-            else: raise SemanticError(f"Unclosed function body for '{func_name}'", brace_line, brace_column)
-            print(f"Pass 1: Finished skipping body for '{func_name}'. Current index: {self.current_token_index}")
+            if _DEBUG:
+                print(f"Pass 1: Stored body start index {func_symbol.body_start_index} for '{func_name}'. Skipping body.")
+            self._skip_past_block(f"Unclosed function body for '{func_name}'", brace_line, brace_column)
+            if _DEBUG:
+                print(f"Pass 1: Finished skipping body for '{func_name}'. Current index: {self.current_token_index}")
 
         else:
             # Pass 2: Analyze the body now
-            print(f"Pass 2: Analyzing body for '{func_name}' starting at index {self.current_token_index + 1}.")
+            if _DEBUG:
+                print(f"Pass 2: Analyzing body for '{func_name}' starting at index {self.current_token_index + 1}.")
             self.advance() # Move past '{'
             old_scope = self.current_scope
             self.current_scope = function_scope # Switch to function's scope
+            self._function_stack.append(func_name)
             has_return = self.analyze_function_body(return_type)
+            self._function_stack.pop()
             if return_type != 'vd' and not has_return:
                  raise SemanticError(f"Function '{func_name}' with return type '{return_type}' must have a return statement",
                                      func_symbol.line, func_symbol.column)
             func_symbol.has_return_statement = has_return
             self.current_scope = old_scope
-            print(f"Pass 2: Finished analyzing body for '{func_name}'. Current index: {self.current_token_index}")
+            if _DEBUG:
+                print(f"Pass 2: Finished analyzing body for '{func_name}'. Current index: {self.current_token_index}")
 
     def parse_parameter(self, parameters):
         """Parse a single function parameter and add it to the parameters list"""
@@ -531,11 +750,13 @@ class SemanticAnalyzer:
         self.in_switch = False
         
         # Process function body until we find closing brace
-        while self.current_token_index < len(self.token_stream):
+        n = len(self.token_stream)
+        while self.current_token_index < n:
             token_type, token_value, line, column = self.get_current_token()
             
             # Debug output
-            print(f"Function body token: {token_type} '{token_value}' at line {line}, column {column}")
+            if _DEBUG:
+                print(f"Function body token: {token_type} '{token_value}' at line {line}, column {column}")
             
             # Check for end of function
             if token_type == '}':
@@ -553,16 +774,18 @@ class SemanticAnalyzer:
             if token_type == 'id':
                 next_token = self.peek_next_token()
                 if next_token and next_token[0] == '.':
-                    print(f"Found struct member access pattern, routing to analyze_struct_member_access for {token_value}.{next_token[1]}")
+                    if _DEBUG:
+                        print(f"Found struct member access pattern, routing to analyze_struct_member_access for {token_value}.{next_token[1]}")
                     self.analyze_struct_member_access()
                     continue
                 # Check for increment/decrement operators
-                elif next_token and next_token[0] in ['++', '--']:
+                elif next_token and next_token[0] in _INCDEC_OPERATORS:
                     self.analyze_increment_operation()
                     continue
                 # Check for shortcut assignments
-                elif next_token and next_token[0] in ['+=', '-=', '*=', '/=', '%=']:
-                    print(f"Found shortcut assignment {token_value} {next_token[0]}")
+                elif next_token and next_token[0] in _COMPOUND_ASSIGN_OPERATORS:
+                    if _DEBUG:
+                        print(f"Found shortcut assignment {token_value} {next_token[0]}")
                     self.analyze_assignment()
                     continue
             
@@ -574,7 +797,8 @@ class SemanticAnalyzer:
                 
             # Check for print statement
             if token_type == 'prnt':
-                print("Found print statement in function body - calling analyze_print_statement()")  # Debug
+                if _DEBUG:
+                    print("Found print statement in function body - calling analyze_print_statement()")  # Debug
                 self.analyze_print_statement()
                 continue
                 
@@ -627,9 +851,7 @@ class SemanticAnalyzer:
                 self.analyze_array_access()
                 
                 # Skip to end of statement
-                while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != ';':
-                    self.advance()
-                self.advance()  # Move past semicolon
+                self._skip_past_semicolon()
             elif token_type == 'id':
                 next_token = self.peek_next_token()
                 if next_token and next_token[0] == '=':
@@ -643,7 +865,8 @@ class SemanticAnalyzer:
         # If we haven't found a return but need one (non-void function),
         # do a more thorough scan of the function body
         if not has_return and return_type != 'vd':
-            print("No return found in first pass, performing second linear scan")
+            if _DEBUG:
+                print("No return found in first pass, performing second linear scan")
             # Save current position
             current_pos = self.current_token_index
             
@@ -652,7 +875,7 @@ class SemanticAnalyzer:
             
             # Scan for any return statements in the function body
             brace_level = 1  # We start inside the function body
-            while self.current_token_index < len(self.token_stream):
+            while self.current_token_index < n:
                 token = self.token_stream[self.current_token_index]
                 token_type, token_value, token_line, token_column = token
                 
@@ -667,7 +890,8 @@ class SemanticAnalyzer:
                 
                 # Check for any return statements
                 if token_type == 'rtrn':
-                    print(f"Found return statement in second pass at line {token_line}, column {token_column}")
+                    if _DEBUG:
+                        print(f"Found return statement in second pass at line {token_line}, column {token_column}")
                     has_return = True
                     break
                 
@@ -680,7 +904,8 @@ class SemanticAnalyzer:
         self.in_loop = old_in_loop
         self.in_switch = old_in_switch
         
-        print(f"Function body analysis complete. Has return: {has_return}")
+        if _DEBUG:
+            print(f"Function body analysis complete. Has return: {has_return}")
         return has_return
 
     def analyze_return_statement(self, function_return_type, line, column):
@@ -708,13 +933,8 @@ class SemanticAnalyzer:
         # For void functions, return should not have a value
         if function_return_type == 'vd':
             # --- ADDED: Check if we are in 'mn' function, which now allows return 0 ---
-            is_main_function = False
-            temp_scope = self.current_scope
-            while temp_scope:
-                if temp_scope.scope_name == "function mn":
-                    is_main_function = True
-                    break
-                temp_scope = temp_scope.parent
+            function_stack = self._function_stack
+            is_main_function = bool(function_stack) and function_stack[-1] == "mn"
 
             if is_main_function:
                 # Allow 'rtrn 0;' in main
@@ -744,8 +964,7 @@ class SemanticAnalyzer:
         # Find the end of the return expression (semicolon)
         start_pos = self.current_token_index
 
-        while self.current_token_index < len(self.token_stream) and self.token_stream[self.current_token_index][0] != ';':
-            self.advance()
+        self._skip_to_semicolon()
 
         if self.current_token_index >= len(self.token_stream):
             raise SemanticError("Unexpected end of file inside return statement", line, column)
@@ -757,21 +976,19 @@ class SemanticAnalyzer:
         expr_type = self.analyze_expression(end_pos)
 
         # --- MODIFIED CHECK for 'mn' ---
-        is_main_function = False
-        temp_scope = self.current_scope
-        while temp_scope:
-            if temp_scope.scope_name == "function mn":
-                is_main_function = True
-                break
-            temp_scope = temp_scope.parent
+        function_stack = self._function_stack
+        is_main_function = bool(function_stack) and function_stack[-1] == "mn"
 
-        if is_main_function:
+        if expr_type == ERR_TYPE:
+            # The expression's own error has already been reported
+            pass
+        elif is_main_function:
              # In 'mn', only allow returning an integer literal 0
              if not (expr_type == 'nt' and self.token_stream[start_pos][0] == 'ntlit' and self.token_stream[start_pos][1] == '0' and start_pos + 1 == end_pos):
                   raise SemanticError(f"Main function ('mn') can only return the integer literal '0', got expression of type '{expr_type}'", token_line, token_column)
         # --- END MODIFIED CHECK ---
         # Check if return type matches function return type (for non-main functions)
-        elif expr_type != function_return_type:
+        elif not self.is_compatible_type(function_return_type, expr_type):
             raise SemanticError(f"Return type mismatch: expected '{function_return_type}', got '{expr_type}'", token_line, token_column)
 
         # Move past the semicolon
@@ -783,12 +1000,14 @@ class SemanticAnalyzer:
         token_type, func_name, line, column = self.get_current_token()
         
         # Debug output
-        print(f"Analyzing function call for '{func_name}' at line {line}, column {column}")
+        if _DEBUG:
+            print(f"Analyzing function call for '{func_name}' at line {line}, column {column}")
         
         # Check if this is a built-in function
         if func_name in self.built_in_functions:
             # Handle built-in functions
-            print(f"  '{func_name}' is a built-in function")
+            if _DEBUG:
+                print(f"  '{func_name}' is a built-in function")
             self.advance()  # Move past function name
             self.advance()  # Move past opening parenthesis
             
@@ -797,7 +1016,8 @@ class SemanticAnalyzer:
 
             # For npt function, return appropriate data type
             if func_name == 'npt':
-                print("  Processing 'npt' input function")
+                if _DEBUG:
+                    print("  Processing 'npt' input function")
                 # npt function with a string prompt returns a string by default
                 # The actual type conversion happens at runtime
                 result_type = 'strng'
@@ -826,7 +1046,8 @@ class SemanticAnalyzer:
                 func_symbol = self.current_scope.lookup(func_name)
             
             # Debug output - check what's in global scope
-            print(f"  Global scope functions: {[name for name, sym in self.global_scope.symbols.items() if sym.type == 'function']}")
+            if _DEBUG:
+                print(f"  Global scope functions: {[name for name, sym in self.global_scope.symbols.items() if sym.type == 'function']}")
             
             if not func_symbol:
                 raise SemanticError(f"Undefined function '{func_name}'", line, column)
@@ -834,7 +1055,8 @@ class SemanticAnalyzer:
             if func_symbol.type != 'function':
                 raise SemanticError(f"'{func_name}' is not a function", line, column)
             
-            print(f"  Found function '{func_name}' with return type '{func_symbol.data_type}'")
+            if _DEBUG:
+                print(f"  Found function '{func_name}' with return type '{func_symbol.data_type}'")
             
             self.advance()  # Move past function name
             self.advance()  # Move past opening parenthesis
@@ -851,7 +1073,7 @@ class SemanticAnalyzer:
             
             # Check argument types against parameter types
             for i, (arg_type, param) in enumerate(zip(arguments, func_symbol.parameters)):
-                if arg_type != param.data_type:
+                if not self.is_compatible_type(param.data_type, arg_type):
                     raise SemanticError(
                         f"Argument {i+1} type mismatch: expected '{param.data_type}', got '{arg_type}'",
                         line, column
@@ -863,6 +1085,37 @@ class SemanticAnalyzer:
             
             return func_symbol.data_type  # Return the function's return type
 
+    def _argument_end(self, start, track_brackets=True):
+        """Return the index of the ',' or ')' that ends the argument starting
+        at `start`: the first ')' closing no '(' opened inside the argument,
+        or the first ',' outside any () (and, with track_brackets, any []).
+        Print arguments pass track_brackets=False, so a ',' inside [] ends
+        them. Returns len(token_stream) if there is none. Scans the _kind_ids
+        column."""
+        kind_ids = self._kind_ids
+        n = len(kind_ids)
+        paren_level = 0
+        bracket_level = 0
+        i = start
+        while i < n:
+            kind_id = kind_ids[i]
+            if kind_id == TOK_LPAREN:
+                paren_level += 1
+            elif kind_id == TOK_RPAREN:
+                if paren_level == 0:
+                    break
+                paren_level -= 1
+            elif kind_id == TOK_LBRACKET:
+                if track_brackets:
+                    bracket_level += 1
+            elif kind_id == TOK_RBRACKET:
+                if track_brackets:
+                    bracket_level -= 1
+            elif kind_id == TOK_COMMA and paren_level == 0 and bracket_level == 0:
+                break
+            i += 1
+        return i
+
     def parse_function_arguments(self):
         """Parse function arguments and return a list of their types"""
         argument_types = []
@@ -876,33 +1129,8 @@ class SemanticAnalyzer:
         while True:
             # Find the end of this argument
             arg_start = self.current_token_index
-            paren_level = 0
-            bracket_level = 0
-            
-            # Continue until we find a comma or closing parenthesis at the top level
-            while self.current_token_index < len(self.token_stream):
-                token_type = self.token_stream[self.current_token_index][0]
-                
-                if token_type == '(':
-                    paren_level += 1
-                elif token_type == ')':
-                    if paren_level == 0:
-                        # End of all arguments
-                        break
-                    paren_level -= 1
-                elif token_type == '[':
-                    bracket_level += 1
-                elif token_type == ']':
-                    bracket_level -= 1
-                elif token_type == ',' and paren_level == 0 and bracket_level == 0:
-                    # End of current argument
-                    break
-                    
-                self.current_token_index += 1
-            
-            # Reset to the start of the argument
-            arg_end = self.current_token_index
-            self.current_token_index = arg_start
+            # Find the comma or closing parenthesis that ends it at the top level
+            arg_end = self._argument_end(arg_start)
             
             # Parse the current argument expression
             arg_type = self.analyze_expression(arg_end)
@@ -933,21 +1161,10 @@ class SemanticAnalyzer:
         token_type, token_value, line, column = self.get_current_token()
         
         # Literal values
-        if token_type in ['ntlit', '~ntlit']:
-            self.advance()
-            return 'nt'
-        elif token_type in ['dbllit', '~dbllit']:
+        literal_type = _LITERAL_OPERAND_TYPE.get(token_type)
+        if literal_type is not None:
             self.advance()
-            return 'dbl'
-        elif token_type in ['true', 'false', 'blnlit']:
-            self.advance()
-            return 'bln'
-        elif token_type == 'chrlit':
-            self.advance()
-            return 'chr'
-        elif token_type == 'strnglit':
-            self.advance()
-            return 'strng'
+            return literal_type
         elif token_type == 'id':
             # Could be a variable or a function call
             symbol = self.current_scope.lookup(token_value)
@@ -992,32 +1209,9 @@ class SemanticAnalyzer:
         else:
             # IMPROVED: Handle general expressions with proper nesting
             # Find the end of this argument considering nested parentheses/brackets
-            paren_level = 0
-            bracket_level = 0
-            
-            # Continue until we find a comma or closing parenthesis at the top level
-            while self.current_token_index < len(self.token_stream):
-                current_token = self.get_current_token()[0]
-                
-                if current_token == '(':
-                    paren_level += 1
-                elif current_token == ')':
-                    if paren_level == 0:
-                        # End of all arguments
-                        break
-                    paren_level -= 1
-                elif current_token == '[':
-                    bracket_level += 1
-                elif current_token == ']':
-                    bracket_level -= 1
-                elif current_token == ',' and paren_level == 0 and bracket_level == 0:
-                    # End of current argument
-                    break
-                    
-                self.advance()
+            expr_end = self._argument_end(self.current_token_index)
             
             # Analyze the expression
-            expr_end = self.current_token_index
             self.current_token_index = arg_start
             return self.analyze_expression(expr_end)
 
@@ -1035,7 +1229,7 @@ class SemanticAnalyzer:
         if token_type != 'id':
             raise SemanticError(f"Expected struct name, got '{token_type}'", line, column)
         
-        struct_name = token_value
+        struct_name = sys.intern(token_value)
         
         # Check for duplicate declaration
         if self.current_scope.lookup(struct_name):
@@ -1050,54 +1244,52 @@ class SemanticAnalyzer:
         
         self.advance()  # Move past '{'
         
-        # Process struct members
+        # Process struct members (driven by STRUCT_MEMBER_STATES)
         members = {}
-        
-        while self.current_token_index < len(self.token_stream):
-            token_type, token_value, line, column = self.get_current_token()
-            
+        tokens = self.token_stream
+        data_types = self.data_types
+        i = self.current_token_index
+        state = 0
+        member_type = None
+
+        while i < len(tokens):
+            token_type, token_value, line, column = tokens[i]
+
             # Check for end of struct
-            if token_type == '}':
+            if state == 0 and token_type == '}':
                 break
-            
-            # Parse member data type
-            if token_type not in self.data_types:
-                raise SemanticError(f"Expected a data type for struct member, got '{token_type}'", line, column)
-            
-            member_type = token_type
-            self.advance()  # Move past data type
-            
-            # Parse member name
-            token_type, token_value, line, column = self.get_current_token()
-            if token_type != 'id':
-                raise SemanticError(f"Expected member name, got '{token_type}'", line, column)
-            
-            member_name = token_value
-            
-            # Check for duplicate member
-            if member_name in members:
-                raise SemanticError(f"Duplicate member '{member_name}' in struct '{struct_name}'", line, column)
-            
-            # Create member symbol
-            member_symbol = Symbol(
-                name=member_name,
-                type='variable',
-                data_type=member_type,
-                initialized=False,  # Members start uninitialized
-                line=line,
-                column=column
-            )
-            
-            members[member_name] = member_symbol
-            
-            self.advance()  # Move past member name
-            
-            # Check for semicolon
-            token_type, token_value, line, column = self.get_current_token()
-            if token_type != ';':
-                raise SemanticError(f"Expected ';' after struct member, got '{token_type}'", line, column)
-            
-            self.advance()  # Move past semicolon
+
+            expected, next_state = STRUCT_MEMBER_STATES[state]
+            if token_type != expected and not (expected is DATA_TYPE and token_type in data_types):
+                self.current_token_index = i
+                raise SemanticError(STRUCT_MEMBER_ERRORS[state].format(token_type), line, column)
+
+            if state == 0:
+                member_type = token_type
+            elif state == 1:
+                member_name = sys.intern(token_value)
+
+                # Check for duplicate member
+                if member_name in members:
+                    raise SemanticError(f"Duplicate member '{member_name}' in struct '{struct_name}'", line, column)
+
+                # Create member symbol
+                members[member_name] = Symbol(
+                    name=member_name,
+                    type='variable',
+                    data_type=member_type,
+                    initialized=False,  # Members start uninitialized
+                    line=line,
+                    column=column
+                )
+
+            state = next_state
+            i += 1
+
+        self.current_token_index = i
+        if state != 0:
+            # Ran off the end of the token stream mid-member
+            raise SemanticError(STRUCT_MEMBER_ERRORS[state].format(None), None, None)
         
         # Check for closing brace
         token_type, token_value, line, column = self.get_current_token()
@@ -1124,7 +1316,8 @@ class SemanticAnalyzer:
         # Add to global scope (structs are global only)
         self.global_scope.insert(struct_name, struct_symbol)
         
-        print(f"Added struct '{struct_name}' to global scope with {len(members)} members")
+        if _DEBUG:
+            print(f"Added struct '{struct_name}' to global scope with {len(members)} members")
 
     def analyze_struct_instantiation(self):
         """Analyze a struct instance declaration with dfstrct"""
@@ -1148,9 +1341,11 @@ class SemanticAnalyzer:
             raise SemanticError(f"Undefined struct type '{struct_type_name}'", line, column)
         
         self.advance()  # Move past struct type name
+        scope_name = self.current_scope.scope_name
         
         # Process one or more instance declarations
-        while self.current_token_index < len(self.token_stream):
+        n = len(self.token_stream)
+        while self.current_token_index < n:
             token_type, token_value, line, column = self.get_current_token()
             
             # Check for end of declaration
@@ -1162,7 +1357,7 @@ class SemanticAnalyzer:
             if token_type != 'id':
                 raise SemanticError(f"Expected struct instance name, got '{token_type}'", line, column)
             
-            instance_name = token_value
+            instance_name = sys.intern(token_value)
             
             # Check for duplicate declaration - FIXED to work in current scope
             if self.current_scope.lookup(instance_name):
@@ -1182,7 +1377,8 @@ class SemanticAnalyzer:
             self.current_scope.insert(instance_name, instance_symbol)
 
             # Add this debug output:
-            print(f"Added struct instance '{instance_name}' of type '{struct_type_name}' to scope '{self.current_scope.scope_name}'")
+            if _DEBUG:
+                print(f"Added struct instance '{instance_name}' of type '{struct_type_name}' to scope '{scope_name}'")
             
             self.advance()  # Move past instance name
             
@@ -1204,12 +1400,13 @@ class SemanticAnalyzer:
         # Get struct instance name
         token_type, instance_name, line, column = self.get_current_token()
 
-        # Debug output
-        print(f"Analyzing struct member access for '{instance_name}' at line {line}, column {column}")
+        if _DEBUG:
+            print(f"Analyzing struct member access for '{instance_name}' at line {line}, column {column}")
 
         # Check if variable exists
         instance_symbol = self.current_scope.lookup(instance_name)
-        print(f"Looking for struct instance '{instance_name}' in scope '{self.current_scope.scope_name}': {'Found' if instance_symbol else 'Not Found'}")
+        if _DEBUG:
+            print(f"Looking for struct instance '{instance_name}' in scope '{self.current_scope.scope_name}': {'Found' if instance_symbol else 'Not Found'}")
         if not instance_symbol:
             raise SemanticError(f"Undefined variable '{instance_name}'", line, column)
 
@@ -1223,9 +1420,9 @@ class SemanticAnalyzer:
         # Look up the struct type in global scope (structs are only declared globally)
         struct_symbol = self.global_scope.lookup(struct_type_name)
 
-        # Debug
-        print(f"Looking for struct '{struct_type_name}' in global scope")
-        print(f"Global scope contains: {[name for name in self.global_scope.symbols.keys()]}")
+        if _DEBUG:
+            print(f"Looking for struct '{struct_type_name}' in global scope")
+            print(f"Global scope contains: {list(self.global_scope.symbols)}")
 
         if not struct_symbol:
             raise SemanticError(f"Undefined struct type '{struct_type_name}'", line, column)
@@ -1246,6 +1443,7 @@ class SemanticAnalyzer:
         token_type, member_name, line, column = self.get_current_token()
         if token_type != 'id':
             raise SemanticError(f"Expected member name, got '{token_type}'", line, column)
+        member_name = sys.intern(member_name)
 
         # Check if member exists in the struct
         struct_symbol = self.global_scope.lookup(instance_symbol.data_type)
@@ -1259,7 +1457,8 @@ class SemanticAnalyzer:
 
         # Get the member type for expression typing
         member_symbol = struct_symbol.members[member_name]
-        print(f"Finished analyzing struct member access for '{instance_name}.{member_name}', member type: {member_symbol.data_type}")
+        if _DEBUG:
+            print(f"Finished analyzing struct member access for '{instance_name}.{member_name}', member type: {member_symbol.data_type}")
         return member_symbol.data_type # Return the type of the member
             
     # --- Modified analyze_main_function ---
@@ -1278,27 +1477,25 @@ class SemanticAnalyzer:
         main_scope = self.function_scopes["mn"]
         # --- End retrieval ---
 
-        # --- Skip signature part mn() ---
-        self.advance() # Past 'mn'
-        if self.current_token_index >= len(self.token_stream) or self.get_current_token()[0] != '(':
-             raise SemanticError("Expected '(' after 'mn'", self.get_current_token()[2], self.get_current_token()[3])
-        self.advance() # Past '('
-        if self.current_token_index >= len(self.token_stream) or self.get_current_token()[0] != ')':
-             raise SemanticError("Expected ')' after '(' in 'mn'", self.get_current_token()[2], self.get_current_token()[3])
-        self.advance() # Past ')'
+        # --- Skip signature part mn() { ---
+        tokens = self.token_stream
+        start = self.current_token_index
+        for k in range(1, len(MAIN_SIGNATURE)):
+            pos = start + k
+            token = tokens[pos] if pos < len(tokens) else (None, None, None, None)
+            if token[0] != MAIN_SIGNATURE[k]:
+                self.current_token_index = pos
+                raise SemanticError(MAIN_SIGNATURE_ERRORS[k].format(token[0]), token[2], token[3])
+        self.current_token_index = start + len(MAIN_SIGNATURE)  # Past '{'
         # --- End skipping signature ---
 
         # --- Analyze Body ---
         old_scope = self.current_scope
         self.current_scope = main_scope # Switch to main's scope
+        self._function_stack.append("mn")
 
-        # Process opening brace
-        token_type, _, brace_line, brace_column = self.get_current_token()
-        if token_type != '{':
-            raise SemanticError(f"Expected '{{' to start main function body, got '{token_type}'", brace_line, brace_column)
-        self.advance()  # Move past '{'
-
-        print(f"Pass 2: Starting to process main function body in scope '{self.current_scope.scope_name}'")
+        if _DEBUG:
+            print(f"Pass 2: Starting to process main function body in scope '{main_scope.scope_name}'")
 
         # Save old context flags
         old_in_loop = self.in_loop
@@ -1309,13 +1506,15 @@ class SemanticAnalyzer:
         # Process main function body
         self.analyze_function_body("vd") # Pass "vd" as return type
 
-        print(f"Pass 2: Finished processing main function body, returning to scope '{old_scope.scope_name}'")
+        if _DEBUG:
+            print(f"Pass 2: Finished processing main function body, returning to scope '{old_scope.scope_name}'")
 
         # Restore old context flags
         self.in_loop = old_in_loop
         self.in_switch = old_in_switch
 
         # Restore outer scope
+        self._function_stack.pop()
         self.current_scope = old_scope
         # analyze_function_body should leave us positioned after '}'
 
@@ -1323,9 +1522,15 @@ class SemanticAnalyzer:
     def analyze(self, tokens):
         """Main entry point for semantic analysis (Handles Pass 1 and Pass 2)."""
         self.token_stream = tokens
+        self._token_kinds = [token[0] for token in tokens]
+        self._kind_ids = [TOKEN_KIND_IDS.get(kind, TOK_OTHER) for kind in self._token_kinds]
+        self._next_tables = {}
+        self._compute_bracket_matches()
+        self._fatal = False
         self.current_scope = self.global_scope
         self.function_scopes = {} # Initialize/reset function scopes map
-        errors = []
+        self._function_stack = []
+        errors = self._deferred_errors = []
 
         try:
             # --- Pass 1: Collect Declarations ---
@@ -1333,31 +1538,40 @@ class SemanticAnalyzer:
             self.collect_declarations() # Populates global scope with signatures, stores body indices
 
             # --- Debug Print Global Scope After Pass 1 ---
-            print("\n--- Global Scope Contents After Pass 1 ---")
-            if hasattr(self, 'global_scope') and self.global_scope:
-                 for name, symbol in self.global_scope.symbols.items():
-                      print(f"  {name}: {symbol}")
-            else:
-                 print("  Global scope not available.")
-            print("----------------------------------------")
+            if _DEBUG:
+                print("\n--- Global Scope Contents After Pass 1 ---")
+                if hasattr(self, 'global_scope') and self.global_scope:
+                     for name, symbol in self.global_scope.symbols.items():
+                          print(f"  {name}: {symbol}")
+                else:
+                     print("  Global scope not available.")
+                print("----------------------------------------")
             # --- End Debug Print ---
 
 
             # --- Pass 2: Full Analysis ---
             self.current_token_index = 0
             self.current_scope = self.global_scope # Ensure we start in global scope for pass 2
-            print("\nStarting full analysis (Pass 2)...")
+            if _DEBUG:
+                print("\nStarting full analysis (Pass 2)...")
 
-            while self.current_token_index < len(self.token_stream):
+            while self.current_token_index < len(self.token_stream) and not self._fatal:
                 start_of_loop_index = self.current_token_index
                 token_type, token_value, line, column = self.token_stream[self.current_token_index]
-                scope_name = self.current_scope.scope_name if self.current_scope else "None"
-                print(f"Pass 2 - Index: {self.current_token_index}, Token: {token_type} ('{token_value}'), Scope: {scope_name}")
+                if _DEBUG:
+                    scope_name = self.current_scope.scope_name if self.current_scope else "None"
+                    print(f"Pass 2 - Index: {self.current_token_index}, Token: {token_type} ('{token_value}'), Scope: {scope_name}")
 
                 if token_type == 'strct':
-                    print(f"Pass 2: Skipping struct definition '{self.peek_next_token()[1]}'.")
-                    self.skip_struct_declaration()
-                    print(f"Pass 2: After skipping struct, index is {self.current_token_index}")
+                    if _DEBUG:
+                        print(f"Pass 2: Skipping struct definition '{self.peek_next_token()[1]}'.")
+                    span_end = self._skip_spans.get(self.current_token_index)
+                    if span_end is not None:
+                        self.current_token_index = span_end
+                    else:
+                        self.skip_struct_declaration()
+                    if _DEBUG:
+                        print(f"Pass 2: After skipping struct, index is {self.current_token_index}")
                     continue
 
                 # --- SIMPLIFIED 'fnctn' handling in Pass 2 ---
@@ -1368,32 +1582,41 @@ class SemanticAnalyzer:
                     if name_token_idx < len(self.token_stream):
                          func_name_token = self.token_stream[name_token_idx]
                          if func_name_token[0] == 'id': func_name = func_name_token[1]
-                    print(f"Pass 2: Analyzing body of function '{func_name}'.")
+                    if _DEBUG:
+                        print(f"Pass 2: Analyzing body of function '{func_name}'.")
                     self.analyze_function_declaration(is_first_pass=False)
-                    print(f"Pass 2: After analyzing '{func_name}' body, index is {self.current_token_index}")
+                    if _DEBUG:
+                        print(f"Pass 2: After analyzing '{func_name}' body, index is {self.current_token_index}")
                     continue
                 # --- End simplified 'fnctn' handling ---
 
                 # Handle 'mn' function analysis trigger
                 elif token_type == 'mn':
-                    print(f"Pass 2: Analyzing 'mn' function.")
+                    if _DEBUG:
+                        print(f"Pass 2: Analyzing 'mn' function.")
                     self.analyze_main_function() # Analyzes the body
-                    print(f"Pass 2: After analyzing 'mn', index is {self.current_token_index}")
+                    if _DEBUG:
+                        print(f"Pass 2: After analyzing 'mn', index is {self.current_token_index}")
                     continue
 
                 # Handle global declarations (struct instances, variables, constants)
                 elif token_type == 'dfstrct':
-                    print(f"Pass 2: Analyzing struct instantiation.")
+                    if _DEBUG:
+                        print(f"Pass 2: Analyzing struct instantiation.")
                     self.analyze_struct_instantiation()
-                    print(f"Pass 2: After dfstrct, index is {self.current_token_index}")
+                    if _DEBUG:
+                        print(f"Pass 2: After dfstrct, index is {self.current_token_index}")
                     continue
                 elif token_type == 'cnst':
-                    print(f"Pass 2: Analyzing constant declaration.")
+                    if _DEBUG:
+                        print(f"Pass 2: Analyzing constant declaration.")
                     self.analyze_constant_declaration()
-                    print(f"Pass 2: After cnst, index is {self.current_token_index}")
+                    if _DEBUG:
+                        print(f"Pass 2: After cnst, index is {self.current_token_index}")
                     continue
                 elif token_type in self.data_types:
-                    print(f"Pass 2: Analyzing variable/array declaration starting with '{token_type}'.")
+                    if _DEBUG:
+                        print(f"Pass 2: Analyzing variable/array declaration starting with '{token_type}'.")
                     start_pos = self.current_token_index
                     # Look ahead logic to differentiate var/array
                     self.advance() # Past type
@@ -1405,7 +1628,8 @@ class SemanticAnalyzer:
                     self.current_token_index = start_pos
                     if is_array: self.analyze_array_declaration()
                     else: self.analyze_variable_declaration()
-                    print(f"Pass 2: After var/array decl, index is {self.current_token_index}")
+                    if _DEBUG:
+                        print(f"Pass 2: After var/array decl, index is {self.current_token_index}")
                     continue
 
                 # Handle potential top-level statements
@@ -1414,66 +1638,80 @@ class SemanticAnalyzer:
                     handled = False
                     if next_token:
                         if next_token[0] == '.':
-                            print(f"Pass 2: Analyzing top-level struct member access/assignment.")
+                            if _DEBUG:
+                                print(f"Pass 2: Analyzing top-level struct member access/assignment.")
                             self.analyze_struct_member_access() # Returns type, ignore here
                             handled = True
                         # ... (other id handlers: '(', '[', '=', '++', '--', '+=', etc.) ...
                         elif next_token[0] == '(':
-                            print(f"Pass 2: Analyzing top-level function call.")
+                            if _DEBUG:
+                                print(f"Pass 2: Analyzing top-level function call.")
                             self.analyze_function_call() # Returns type, ignore here
                             handled = True
                         elif next_token[0] == '[':
-                            print(f"Pass 2: Analyzing top-level array access/assignment.")
+                            if _DEBUG:
+                                print(f"Pass 2: Analyzing top-level array access/assignment.")
                             self.analyze_array_access() # Returns type, ignore here
                             if self.current_token_index < len(self.token_stream) and self.get_current_token()[0] == ';': self.advance()
                             handled = True
                         elif next_token[0] == '=':
-                            print(f"Pass 2: Analyzing top-level assignment.")
+                            if _DEBUG:
+                                print(f"Pass 2: Analyzing top-level assignment.")
                             self.analyze_assignment()
                             handled = True
-                        elif next_token[0] in ['++', '--']:
-                            print(f"Pass 2: Analyzing top-level increment/decrement.")
+                        elif next_token[0] in _INCDEC_OPERATORS:
+                            if _DEBUG:
+                                print(f"Pass 2: Analyzing top-level increment/decrement.")
                             self.analyze_increment_operation()
                             handled = True
-                        elif next_token[0] in ['+=', '-=', '*=', '/=', '%=']:
-                            print(f"Pass 2: Analyzing top-level shortcut assignment.")
+                        elif next_token[0] in _COMPOUND_ASSIGN_OPERATORS:
+                            if _DEBUG:
+                                print(f"Pass 2: Analyzing top-level shortcut assignment.")
                             self.analyze_assignment() # Handles shortcut ops too
                             handled = True
 
                     if handled:
-                         print(f"Pass 2: After top-level ID statement, index is {self.current_token_index}")
+                         if _DEBUG:
+                             print(f"Pass 2: After top-level ID statement, index is {self.current_token_index}")
                          continue
                     else:
-                         print(f"Pass 2: Advancing past unhandled ID '{token_value}'.")
+                         if _DEBUG:
+                             print(f"Pass 2: Advancing past unhandled ID '{token_value}'.")
                          self.advance() # Advance if ID wasn't part of a handled statement
 
                 elif token_type == 'prnt':
-                     print(f"Pass 2: Analyzing top-level print statement.")
+                     if _DEBUG:
+                         print(f"Pass 2: Analyzing top-level print statement.")
                      self.analyze_print_statement()
-                     print(f"Pass 2: After top-level prnt, index is {self.current_token_index}")
+                     if _DEBUG:
+                         print(f"Pass 2: After top-level prnt, index is {self.current_token_index}")
                      continue
 
                 # If the token wasn't handled by any case above, advance.
                 if self.current_token_index == start_of_loop_index:
-                     print(f"Pass 2: Advancing past unhandled token {token_type} ('{token_value}') to prevent loop.")
+                     if _DEBUG:
+                         print(f"Pass 2: Advancing past unhandled token {token_type} ('{token_value}') to prevent loop.")
                      self.advance()
 
             # --- End of Pass 2 ---
-            print("\nFinished full analysis (Pass 2).")
-            self.print_symbol_tables()
-            return True, errors
+            if _DEBUG:
+                print("\nFinished full analysis (Pass 2).")
+                self.print_symbol_tables()
+            return not errors, errors
 
         except SemanticError as e:
             errors.append(str(e))
-            print("\n--- Symbol Tables after Error ---")
-            self.print_symbol_tables()
-            print("-----------------------------")
+            if _DEBUG:
+                print("\n--- Symbol Tables after Error ---")
+                self.print_symbol_tables()
+                print("-----------------------------")
             return False, errors
         except Exception as e:
              errors.append(f"Unexpected Internal Error during analysis: {e}")
-             print("\n--- Symbol Tables after Internal Error ---")
-             self.print_symbol_tables()
-             print("-----------------------------")
+             if _DEBUG:
+                 print("\n--- Symbol Tables after Internal Error ---")
+                 self.print_symbol_tables()
+                 print("-----------------------------")
              import traceback
              traceback.print_exc()
              return False, errors
@@ -1618,6 +1856,7 @@ class SemanticAnalyzer:
         var_token_type, var_name, name_line, name_column = self.get_current_token()
         if var_token_type != 'id':
             raise SemanticError(f"Expected an identifier, got {var_token_type}", name_line, name_column)
+        var_name = sys.intern(var_name)
         
         # Check for duplicate declaration
         if self.current_scope.lookup(var_name) and self.current_scope.symbols.get(var_name):
@@ -1641,23 +1880,11 @@ class SemanticAnalyzer:
         
         self.advance()  # Move past '='
         
-        # Save starting position for expression analysis
-        start_pos = self.current_token_index
-        
-        # Skip ahead to find the end of the expression (semicolon or comma)
-        while (self.current_token_index < len(self.token_stream) and 
-            self.token_stream[self.current_token_index][0] not in [';', ',']):
-            self.advance()
-        
-        # Reset position to start of expression
-        end_pos = self.current_token_index
-        self.current_token_index = start_pos
-        
-        # Analyze the expression
-        expr_type = self.analyze_expression(end_pos)
+        # Analyze the expression up to the next ';' or ','
+        expr_type = self.analyze_expression_until(DECLARATION_STOP_TOKENS)
         
         # Check if the expression type matches the variable type
-        if data_type_token != expr_type:
+        if not self.is_compatible_type(data_type_token, expr_type):
             raise SemanticError(
                 f"Type mismatch: Cannot initialize constant '{data_type_token}' with {expr_type}",
                 line, column
@@ -1691,6 +1918,7 @@ class SemanticAnalyzer:
         var_token_type, var_name, name_line, name_column = self.get_current_token()
         if var_token_type != 'id':
             raise SemanticError(f"Expected an identifier, got {var_token_type}", name_line, name_column)
+        var_name = sys.intern(var_name)
         
         # Check for duplicate declaration
         if self.current_scope.lookup(var_name) and self.current_scope.symbols.get(var_name):
@@ -1711,23 +1939,11 @@ class SemanticAnalyzer:
         
         self.advance()  # Move past '='
         
-        # Save starting position for expression analysis
-        start_pos = self.current_token_index
-        
-        # Skip ahead to find the end of the expression (semicolon or comma)
-        while (self.current_token_index < len(self.token_stream) and 
-            self.token_stream[self.current_token_index][0] not in [';', ',']):
-            self.advance()
-        
-        # Reset position to start of expression
-        end_pos = self.current_token_index
-        self.current_token_index = start_pos
-        
-        # Analyze the expression
-        expr_type = self.analyze_expression(end_pos)
+        # Analyze the expression up to the next ';' or ','
+        expr_type = self.analyze_expression_until(DECLARATION_STOP_TOKENS)
         
         # Check if the expression type matches the variable type
-        if data_type != expr_type:
+        if not self.is_compatible_type(data_type, expr_type):
             raise SemanticError(
                 f"Type mismatch: Cannot initialize constant '{data_type}' with {expr_type}",
                 line, column
@@ -1762,12 +1978,14 @@ class SemanticAnalyzer:
         self.advance()  # Move past the data type
         
         # Continue parsing declarations until we hit a semicolon or end of statement
-        while self.current_token_index < len(self.token_stream):
+        n = len(self.token_stream)
+        while self.current_token_index < n:
             # Get variable name
             var_token_type, var_name, name_line, name_column = self.get_current_token()
             
             if var_token_type != 'id':
                 raise SemanticError(f"Expected an identifier, got {var_token_type}", name_line, name_column)
+            var_name = sys.intern(var_name)
             
             # Check for duplicate declaration in current scope
             if self.current_scope.lookup(var_name) and self.current_scope.symbols.get(var_name):
@@ -1791,23 +2009,11 @@ class SemanticAnalyzer:
             if token_type == '=':
                 self.advance()  # Move past '='
                 
-                # Save starting position for expression analysis
-                start_pos = self.current_token_index
-                
-                # Skip ahead to find the end of the expression (semicolon or comma)
-                while (self.current_token_index < len(self.token_stream) and 
-                       self.token_stream[self.current_token_index][0] not in [';', ',']):
-                    self.advance()
-                
-                # Reset position to start of expression
-                end_pos = self.current_token_index
-                self.current_token_index = start_pos
-                
-                # Analyze the expression
-                expr_type = self.analyze_expression(end_pos)
+                # Analyze the expression up to the next ';' or ','
+                expr_type = self.analyze_expression_until(DECLARATION_STOP_TOKENS)
                 
                 # Check if the expression type matches the variable type
-                if data_type != expr_type:
+                if not self.is_compatible_type(data_type, expr_type):
                     # Special case for boolean variables being assigned relational expressions
                     if data_type == 'bln' and expr_type == 'bln':
                         # This is fine, expression results in boolean and variable is boolean
@@ -1861,6 +2067,7 @@ class SemanticAnalyzer:
         
         if var_token_type != 'id':
             raise SemanticError(f"Expected an identifier, got {var_token_type}", name_line, name_column)
+        var_name = sys.intern(var_name)
         
         # Check for duplicate declaration in current scope
         if self.current_scope.lookup(var_name) and self.current_scope.symbols.get(var_name):
@@ -1981,7 +2188,8 @@ class SemanticAnalyzer:
             
             # Add the array symbol to the symbol table
             self.current_scope.insert(var_name, symbol)
-            print(f"Added array '{var_name}' of type '{data_type}' with dimensions {array_dimensions} to scope '{self.current_scope.scope_name}'")
+            if _DEBUG:
+                print(f"Added array '{var_name}' of type '{data_type}' with dimensions {array_dimensions} to scope '{self.current_scope.scope_name}'")
             
         else:
             # This is a regular variable, not an array
@@ -2000,23 +2208,12 @@ class SemanticAnalyzer:
             if self.get_current_token()[0] == '=':
                 self.advance()  # Move past '='
                 
-                # Save starting position for expression analysis
-                start_pos = self.current_token_index
-                
-                # Skip ahead to find the end of the expression (semicolon or comma)
-                while (self.current_token_index < len(self.token_stream) and 
-                    self.token_stream[self.current_token_index][0] not in [';', ',']):
-                    self.advance()
-                
-                # Reset position to start of expression
-                end_pos = self.current_token_index
-                self.current_token_index = start_pos
-                
-                # Analyze the expression
-                expr_type = self.analyze_expression(end_pos)
+                # Analyze the expression, which ends at the next semicolon or
+                # comma, and stay on that token
+                expr_type = self.analyze_expression_until(DECLARATION_STOP_TOKENS, stop_at_end=True)
                 
                 # Check if the expression type matches the variable type
-                if data_type != expr_type:
+                if not self.is_compatible_type(data_type, expr_type):
                     # Special case for boolean variables being assigned relational expressions
                     if data_type == 'bln' and expr_type == 'bln':
                         # This is fine, expression results in boolean and variable is boolean
@@ -2029,12 +2226,12 @@ class SemanticAnalyzer:
                 
                 symbol.initialized = True
                 
-                # Move to end of expression
-                self.current_token_index = end_pos
+                # Current position is now at the end of the expression
             
             # Add the variable symbol to the symbol table
             self.current_scope.insert(var_name, symbol)
-            print(f"Added variable '{var_name}' of type '{data_type}' to scope '{self.current_scope.scope_name}'")
+            if _DEBUG:
+                print(f"Added variable '{var_name}' of type '{data_type}' to scope '{self.current_scope.scope_name}'")
         
         # Check for comma or semicolon
         if self.get_current_token()[0] == ',':
@@ -2046,158 +2243,146 @@ class SemanticAnalyzer:
             raise SemanticError(f"Expected ',' or ';', got {self.get_current_token()[0]}", 
                             self.get_current_token()[2], self.get_current_token()[3])
 
-    def validate_1d_array_init(self, symbol, data_type, size):
-        """Validate 1D array initialization"""
-        self.advance()  # Move past '{'
+    def _scan_init_row(self, i, data_type, allowed_mask, lookup_cache):
+        """Validate the elements of one initializer row starting at token index `i`,
+        stopping at its closing '}'. Returns (index of the '}', element count)."""
+        tokens = self.token_stream
+        kind_ids = self._kind_ids
+        n = len(tokens)
         
         element_count = 0
         
         # Process elements until we see '}'
-        while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != '}':
+        while i < n and kind_ids[i] != TOK_RBRACE:
             # Get element
-            elem_type, elem_value, elem_line, elem_column = self.get_current_token()
+            token = tokens[i]
+            kind_id = kind_ids[i]
             
             # Validate element type
-            if data_type == 'nt' and elem_type not in ['ntlit', '~ntlit', 'id']:
-                raise SemanticError(f"Type mismatch: Array element must be 'nt', got '{elem_type}'", 
-                                elem_line, elem_column)
-            elif data_type == 'dbl' and elem_type not in ['dbllit', '~dbllit', 'ntlit', '~ntlit', 'id']:
-                raise SemanticError(f"Type mismatch: Array element must be 'dbl', got '{elem_type}'", 
-                                elem_line, elem_column)
-            elif data_type == 'bln' and elem_type not in ['true', 'false', 'blnlit', 'id']:
-                raise SemanticError(f"Type mismatch: Array element must be 'bln', got '{elem_type}'", 
-                                elem_line, elem_column)
-            elif data_type == 'chr' and elem_type not in ['chrlit', 'id']:
-                raise SemanticError(f"Type mismatch: Array element must be 'chr', got '{elem_type}'", 
-                                elem_line, elem_column)
-            elif data_type == 'strng' and elem_type not in ['strnglit', 'id']:
-                raise SemanticError(f"Type mismatch: Array element must be 'strng', got '{elem_type}'", 
-                                elem_line, elem_column)
+            if not (allowed_mask >> kind_id) & 1:
+                raise SemanticError(f"Type mismatch: Array element must be '{data_type}', got '{token[0]}'", 
+                                token[2], token[3])
             
             # If element is an identifier, check if it's declared and of the right type
-            if elem_type == 'id':
-                elem_symbol = self.current_scope.lookup(elem_value)
+            if kind_id == TOK_ID:
+                elem_value = token[1]
+                elem_symbol = lookup_cache.get(elem_value)
+                if elem_symbol is None:
+                    elem_symbol = lookup_cache[elem_value] = self.current_scope.lookup(elem_value)
                 if not elem_symbol:
                     raise SemanticError(f"Undefined variable '{elem_value}' used as array element", 
-                                    elem_line, elem_column)
+                                    token[2], token[3])
                 if elem_symbol.data_type != data_type:
                     raise SemanticError(f"Type mismatch: Array element must be '{data_type}', got '{elem_symbol.data_type}'", 
-                                    elem_line, elem_column)
+                                    token[2], token[3])
                 if not elem_symbol.initialized:
                     raise SemanticError(f"Uninitialized variable '{elem_value}' used as array element", 
-                                    elem_line, elem_column)
+                                    token[2], token[3])
             
             element_count += 1
-            self.advance()  # Move past element
+            i += 1  # Move past element
             
             # Skip comma if present
-            if self.get_current_token()[0] == ',':
-                self.advance()
+            if i < n and kind_ids[i] == TOK_COMMA:
+                i += 1
+        
+        return i, element_count
+
+    def validate_1d_array_init(self, symbol, data_type, size):
+        """Validate 1D array initialization"""
+        size_is_literal = isinstance(size, int)  # Sizes given by a variable name are not checked
+        i = self.current_token_index + 1  # Move past '{'
+        
+        if i < len(self._kind_ids) and self._kind_ids[i] == TOK_RBRACE:
+            # Empty '{}' initializer, nothing to scan
+            element_count = 0
+        else:
+            # Process elements until we see '}'
+            allowed_mask = _ARRAY_ELEM_MASKS.get(data_type, _ANY_ELEM_MASK)  # Bit per TOKEN_KIND_IDS id allowed as an element
+            lookup_cache = {}  # Identifier -> Symbol for names repeated in this initializer
+            i, element_count = self._scan_init_row(i, data_type, allowed_mask, lookup_cache)
+        
+        self.current_token_index = i
         
         # Check if we've gone over the array size
-        if isinstance(size, int) and element_count > size:
+        if size_is_literal and element_count > size:
             raise SemanticError(f"Array initialization has {element_count} elements, but array size is {size}", 
                             self.get_current_token()[2], self.get_current_token()[3])
         
         # For constant arrays, ensure all elements are initialized
-        if symbol.is_constant and isinstance(size, int) and element_count < size:
+        if symbol.is_constant and size_is_literal and element_count < size:
             raise SemanticError(f"Constant array must initialize all {size} elements, but only {element_count} provided", 
                             self.get_current_token()[2], self.get_current_token()[3])
         
-        self.advance()  # Move past '}'
+        self.current_token_index = i + 1  # Move past '}'
 
     def validate_2d_array_init(self, symbol, data_type, rows, cols):
         """Validate 2D array initialization"""
-        self.advance()  # Move past '{'
+        tokens = self.token_stream
+        kind_ids = self._kind_ids
+        n = len(tokens)
+        i = self.current_token_index + 1  # Move past '{'
+        allowed_mask = _ARRAY_ELEM_MASKS.get(data_type, _ANY_ELEM_MASK)  # Bit per TOKEN_KIND_IDS id allowed as an element
+        lookup_cache = {}  # Identifier -> Symbol for names repeated in this initializer
+        rows_is_literal = isinstance(rows, int)  # Sizes given by a variable name are not checked
+        cols_is_literal = isinstance(cols, int)
         
         row_count = 0
         
         # Process rows until we see '}'
-        while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != '}':
-            if self.get_current_token()[0] != '{':
-                raise SemanticError(f"Expected '{{' for 2D array row, got {self.get_current_token()[0]}", 
-                                self.get_current_token()[2], self.get_current_token()[3])
+        while i < n and kind_ids[i] != TOK_RBRACE:
+            if kind_ids[i] != TOK_LBRACE:
+                raise SemanticError(f"Expected '{{' for 2D array row, got {tokens[i][0]}", 
+                                tokens[i][2], tokens[i][3])
             
-            self.advance()  # Move past '{'
+            i += 1  # Move past '{'
             
-            col_count = 0
+            if i < n and kind_ids[i] == TOK_RBRACE:
+                # Empty '{}' row, nothing to scan
+                col_count = 0
+            else:
+                # Process elements in this row
+                i, col_count = self._scan_init_row(i, data_type, allowed_mask, lookup_cache)
             
-            # Process elements in this row
-            while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != '}':
-                # Get element
-                elem_type, elem_value, elem_line, elem_column = self.get_current_token()
-                
-                # Validate element type (same as 1D array validation)
-                if data_type == 'nt' and elem_type not in ['ntlit', '~ntlit', 'id']:
-                    raise SemanticError(f"Type mismatch: Array element must be 'nt', got '{elem_type}'", 
-                                    elem_line, elem_column)
-                elif data_type == 'dbl' and elem_type not in ['dbllit', '~dbllit', 'ntlit', '~ntlit', 'id']:
-                    raise SemanticError(f"Type mismatch: Array element must be 'dbl', got '{elem_type}'", 
-                                    elem_line, elem_column)
-                elif data_type == 'bln' and elem_type not in ['true', 'false', 'blnlit', 'id']:
-                    raise SemanticError(f"Type mismatch: Array element must be 'bln', got '{elem_type}'", 
-                                    elem_line, elem_column)
-                elif data_type == 'chr' and elem_type not in ['chrlit', 'id']:
-                    raise SemanticError(f"Type mismatch: Array element must be 'chr', got '{elem_type}'", 
-                                    elem_line, elem_column)
-                elif data_type == 'strng' and elem_type not in ['strnglit', 'id']:
-                    raise SemanticError(f"Type mismatch: Array element must be 'strng', got '{elem_type}'", 
-                                    elem_line, elem_column)
-                
-                # If element is an identifier, check its type
-                if elem_type == 'id':
-                    elem_symbol = self.current_scope.lookup(elem_value)
-                    if not elem_symbol:
-                        raise SemanticError(f"Undefined variable '{elem_value}' used as array element", 
-                                        elem_line, elem_column)
-                    if elem_symbol.data_type != data_type:
-                        raise SemanticError(f"Type mismatch: Array element must be '{data_type}', got '{elem_symbol.data_type}'", 
-                                        elem_line, elem_column)
-                    if not elem_symbol.initialized:
-                        raise SemanticError(f"Uninitialized variable '{elem_value}' used as array element", 
-                                        elem_line, elem_column)
-                
-                col_count += 1
-                self.advance()  # Move past element
-                
-                # Skip comma if present
-                if self.get_current_token()[0] == ',':
-                    self.advance()
+            self.current_token_index = i
             
             # Check if we've gone over the columns size
-            if isinstance(cols, int) and col_count > cols:
+            if cols_is_literal and col_count > cols:
                 raise SemanticError(f"Row {row_count} has {col_count} elements, but array column size is {cols}", 
                                 self.get_current_token()[2], self.get_current_token()[3])
                                 
             # For constant arrays, ensure all elements in each row are initialized
-            if symbol.is_constant and isinstance(cols, int) and col_count < cols:
+            if symbol.is_constant and cols_is_literal and col_count < cols:
                 raise SemanticError(f"Constant array row must initialize all {cols} elements, but only {col_count} provided", 
                                 self.get_current_token()[2], self.get_current_token()[3])
             
-            self.advance()  # Move past '}' for this row
+            i += 1  # Move past '}' for this row
             row_count += 1
             
             # Skip comma if present
-            if self.get_current_token()[0] == ',':
-                self.advance()
+            if i < n and kind_ids[i] == TOK_COMMA:
+                i += 1
+        
+        self.current_token_index = i
         
         # Check if we've gone over the rows size
-        if isinstance(rows, int) and row_count > rows:
+        if rows_is_literal and row_count > rows:
             raise SemanticError(f"Array initialization has {row_count} rows, but array row size is {rows}", 
                             self.get_current_token()[2], self.get_current_token()[3])
         
         # For constant arrays, ensure all rows are initialized
-        if symbol.is_constant and isinstance(rows, int) and row_count < rows:
+        if symbol.is_constant and rows_is_literal and row_count < rows:
             raise SemanticError(f"Constant array must initialize all {rows} rows, but only {row_count} provided", 
                             self.get_current_token()[2], self.get_current_token()[3])
         
-        self.advance()  # Move past '}'
+        self.current_token_index = i + 1  # Move past '}'
 
     def analyze_array_access(self):
         """
         Analyze array element access (reading or assignment LHS) and return the element type.
         This function only analyzes the `id[...]` part, not the assignment or RHS.
         """
+        n = len(self.token_stream)
         var_token_type, var_name, line, column = self.get_current_token()
 
         # Check if variable exists
@@ -2220,43 +2405,31 @@ class SemanticAnalyzer:
         self.advance()  # Move past '['
 
         # Save the current index token for bounds checking
-        index1_token_type, index1_value, index1_line, index1_column = self.get_current_token()
+        index1_token = self.get_current_token()
 
-        # Find the end of this index expression (should be the closing bracket)
-        start_pos = self.current_token_index
-        bracket_level = 1
-
-        while bracket_level > 0 and self.current_token_index < len(self.token_stream):
-            # Need to check for nested brackets within the index expression
-            current_token = self.token_stream[self.current_token_index][0]
-            if current_token == '[':
-                bracket_level += 1
-            elif current_token == ']':
-                bracket_level -= 1
-
-            if bracket_level > 0: # Advance only if still inside brackets
-                self.current_token_index += 1
-
-            if self.current_token_index >= len(self.token_stream):
-                raise SemanticError("Unclosed bracket in array access", line, column)
-
-
-        # Now self.current_token_index is at the closing ']'
+        # Find the end of this index expression (the matching closing bracket)
         end_pos = self.current_token_index
-        self.current_token_index = start_pos # Reset position to analyze the expression
+        if end_pos < n:
+            end_pos = self._find_matching(end_pos - 1, n, "Unclosed bracket in array access", line, column)
 
         # Analyze the index expression - it must evaluate to type nt
-        index1_type = self.analyze_expression(end_pos)
-        if index1_type != 'nt':
+        if index1_token[0] == 'ntlit' and end_pos - self.current_token_index == 1:
+            # A lone integer literal: nothing for the expression parser to do
+            index1_type = 'nt'
+            self.current_token_index = end_pos
+        else:
+            index1_type = self.analyze_expression(end_pos)
+        if not self.is_compatible_type('nt', index1_type):
             raise SemanticError(f"Array index must be of type 'nt', got '{index1_type}'",
-                            index1_line, index1_column)
+                            index1_token[2], index1_token[3])
 
         # Check bounds if index is a literal and size is known
-        if index1_token_type == 'ntlit' and isinstance(symbol.array_sizes[0], int):
-            index1 = int(index1_value)
-            if index1 < 0 or index1 >= symbol.array_sizes[0]:
-                raise SemanticError(f"Array index {index1} out of bounds (size {symbol.array_sizes[0]})",
-                                index1_line, index1_column)
+        size = symbol.static_sizes[0]
+        if index1_token[0] == 'ntlit' and size is not None:
+            index1 = int(index1_token[1])
+            if index1 < 0 or index1 >= size:
+                raise SemanticError(f"Array index {index1} out of bounds (size {size})",
+                                index1_token[2], index1_token[3])
 
         # Move past the closing bracket
         if self.get_current_token()[0] != ']':
@@ -2274,42 +2447,30 @@ class SemanticAnalyzer:
             self.advance()  # Move past '['
 
             # Save the current index token for bounds checking
-            index2_token_type, index2_value, index2_line, index2_column = self.get_current_token()
-
-            # Find the end of this index expression (should be the closing bracket)
-            start_pos = self.current_token_index
-            bracket_level = 1
-
-            while bracket_level > 0 and self.current_token_index < len(self.token_stream):
-                # Need to check for nested brackets within the index expression
-                current_token = self.token_stream[self.current_token_index][0]
-                if current_token == '[':
-                    bracket_level += 1
-                elif current_token == ']':
-                    bracket_level -= 1
-
-                if bracket_level > 0: # Advance only if still inside brackets
-                     self.current_token_index += 1
-
-                if self.current_token_index >= len(self.token_stream):
-                    raise SemanticError("Unclosed bracket in 2D array access", line, column)
+            index2_token = self.get_current_token()
 
-            # Now self.current_token_index is at the closing ']'
+            # Find the end of this index expression (the matching closing bracket)
             end_pos = self.current_token_index
-            self.current_token_index = start_pos # Reset position to analyze the expression
+            if end_pos < n:
+                end_pos = self._find_matching(end_pos - 1, n, "Unclosed bracket in 2D array access", line, column)
 
             # Validate index expression is of type nt
-            index2_type = self.analyze_expression(end_pos)
-            if index2_type != 'nt':
+            if index2_token[0] == 'ntlit' and end_pos - self.current_token_index == 1:
+                index2_type = 'nt'
+                self.current_token_index = end_pos
+            else:
+                index2_type = self.analyze_expression(end_pos)
+            if not self.is_compatible_type('nt', index2_type):
                 raise SemanticError(f"Array index must be of type 'nt', got '{index2_type}'",
-                                index2_line, index2_column)
+                                index2_token[2], index2_token[3])
 
             # Check bounds if index is a literal and size is known
-            if index2_token_type == 'ntlit' and isinstance(symbol.array_sizes[1], int):
-                index2 = int(index2_value)
-                if index2 < 0 or index2 >= symbol.array_sizes[1]:
-                    raise SemanticError(f"Array index {index2} out of bounds (size {symbol.array_sizes[1]})",
-                                    index2_line, index2_column)
+            size = symbol.static_sizes[1]
+            if index2_token[0] == 'ntlit' and size is not None:
+                index2 = int(index2_token[1])
+                if index2 < 0 or index2 >= size:
+                    raise SemanticError(f"Array index {index2} out of bounds (size {size})",
+                                    index2_token[2], index2_token[3])
 
             # Move past the closing bracket
             if self.get_current_token()[0] != ']':
@@ -2320,79 +2481,230 @@ class SemanticAnalyzer:
 
         # Return the data type of the array element
         # The caller (analyze_assignment) will handle the '=' and the RHS
-        print(f"Finished analyzing array access for '{var_name}[...]', element type: {symbol.data_type}")
+        if _DEBUG:
+            print(f"Finished analyzing array access for '{var_name}[...]', element type: {symbol.data_type}")
         return symbol.data_type # Return the type of the element
 
     
+    def _find_matching(self, open_index, limit, message, line, column):
+        """Return the index of the bracket that closes the one at `open_index`,
+        raising SemanticError(message) if it is unclosed or closes at/after `limit`."""
+        close_index = self._matching[open_index]
+        if close_index is None or close_index >= limit:
+            raise SemanticError(message, line, column)
+        return close_index
+
+    def _compute_bracket_matches(self):
+        """Pair up brackets in the token stream once, so callers can jump from an
+        opening '(' / '[' / '{' to its closing token (and back) with one lookup.
+        Each bracket kind is matched independently, which gives the same answer
+        as counting that kind's depth forward from the opening token. Unmatched
+        brackets map to None."""
+        tokens = self.token_stream
+        matching = [None] * len(tokens)
+        stacks = {'(': [], '[': [], '{': []}
+        for i, token in enumerate(tokens):
+            kind = token[0]
+            if kind in stacks:
+                stacks[kind].append(i)
+            elif kind in _CLOSING_BRACKETS:
+                stack = stacks[_CLOSING_BRACKETS[kind]]
+                if stack:
+                    j = stack.pop()
+                    matching[j] = i
+                    matching[i] = j
+        self._matching = matching
+
+    def _skip_to_semicolon(self):
+        """Move to the next ';' at or after the current token (or to the end of
+        the stream), using the precomputed ';' table instead of advancing token
+        by token."""
+        i = self.current_token_index
+        if i < len(self.token_stream):
+            self.current_token_index = self._next_index_table(';')[i]
+
+    def _skip_past_block(self, message, line, column):
+        """With the cursor on a '{', move past its matching '}' in one step using
+        the bracket table. Raises SemanticError(message) if it is unclosed."""
+        open_index = self.current_token_index
+        close_index = self._find_matching(open_index, len(self.token_stream), message, line, column)
+        self.current_token_index = close_index + 1
+
+    def _skip_past_semicolon(self):
+        """Move to the token after the next ';' (or just past the end of the stream)."""
+        self._skip_to_semicolon()
+        self.current_token_index += 1
+
+    def _next_index_table(self, kind):
+        """Return a list mapping each index i to the index of the first token of
+        type `kind` at or after i (len(token_stream) if there is none).
+        Built once per kind per token stream."""
+        table = self._next_tables.get(kind)
+        if table is None:
+            tokens = self.token_stream
+            n = len(tokens)
+            table = [n] * (n + 1)
+            nxt = n
+            for i in range(n - 1, -1, -1):
+                if tokens[i][0] == kind:
+                    nxt = i
+                table[i] = nxt
+            self._next_tables[kind] = table
+        return table
+
+    def analyze_expression_until(self, stop_kinds=frozenset({';'}), stop_at_end=False):
+        """Analyze the expression starting at the current token and ending at the
+        first token whose type is in stop_kinds. Equivalent to scanning ahead for
+        the stop token, rewinding and calling analyze_expression(end_pos), but the
+        end is read from the precomputed next-token tables instead. With
+        stop_at_end the current token is left on the stop token, even when a
+        function call in the expression has moved past it."""
+        end_pos = self._next_stop_index(self.current_token_index, stop_kinds)
+        expr_type = self.analyze_expression(end_pos)
+        if stop_at_end:
+            self.current_token_index = end_pos
+        return expr_type
+
+    def _next_stop_index(self, start_pos, stop_kinds=frozenset({';'})):
+        """Return the index of the first token at or after start_pos whose type
+        is in stop_kinds, or len(token_stream) if there is none (start_pos
+        itself if it is already past the end). Read from the next-token tables."""
+        if start_pos >= len(self.token_stream):
+            return start_pos
+        return min(self._next_index_table(kind)[start_pos] for kind in stop_kinds)
+
     def analyze_expression(self, end_pos):
         """Analyze an expression and determine its resulting type using strict type rules"""
-        # Add debug output
-        print(f"Analyzing expression from position {self.current_token_index} to {end_pos}")
-        
+        tokens = self.token_stream
+        n = len(tokens)
         # Save current position
         original_pos = self.current_token_index
         
-        # Debug - show the tokens being analyzed
-        expr_tokens = self.token_stream[original_pos:end_pos]
-        expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
-        print(f"Expression tokens: {expr_str}")
+        if _DEBUG:
+            print(f"Analyzing expression from position {original_pos} to {end_pos}")
+            expr_tokens = tokens[original_pos:end_pos]
+            expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
+            print(f"Expression tokens: {expr_str}")
         
         # Check if this is a simple function call expression
-        if (self.current_token_index < len(self.token_stream) and 
-                self.token_stream[self.current_token_index][0] == 'id'):
-            
-            func_name = self.token_stream[self.current_token_index][1]
-            next_pos = self.current_token_index + 1
-            
-            # Check if next token is opening parenthesis (function call)
-            if (next_pos < len(self.token_stream) and 
-                    self.token_stream[next_pos][0] == '('):
-                
+        if original_pos + 1 < n and tokens[original_pos][0] == 'id':
+            # Kind of the token after the identifier picks the specialized parser
+            next_kind = tokens[original_pos + 1][0]
+            if next_kind == '(':
                 # This might be a function call - use our specialized function call parser
-                return_type = self.analyze_function_call()
-                
-                # If we're at or beyond the end_pos, we're done
-                if self.current_token_index >= end_pos:
-                    return return_type
-                
-                # Otherwise reset position and fall back to regular expression parsing
-                self.current_token_index = original_pos
-            
-            # Check if next token is dot (struct member access)
-            elif (next_pos < len(self.token_stream) and 
-                self.token_stream[next_pos][0] == '.'):
-                print(f"Found potential struct member access: {func_name}.{self.token_stream[next_pos+1][1]}")
-                
+                probe = self.analyze_function_call
+            elif next_kind == '.':
+                if _DEBUG:
+                    print(f"Found potential struct member access: {tokens[original_pos][1]}.{tokens[original_pos + 2][1]}")
                 # This is a struct member access - use our specialized struct member access parser
-                member_type = self.analyze_struct_member_access()
-                
-                # If we're at or beyond the end_pos, we're done
-                if self.current_token_index >= end_pos:
-                    return member_type
-                
-                # Otherwise reset position and fall back to regular expression parsing
-                self.current_token_index = original_pos
-                
-            # NEW: Check if next token is square bracket (array access)
-            elif (next_pos < len(self.token_stream) and 
-                self.token_stream[next_pos][0] == '['):
-                print(f"Found potential array access: {func_name}[...]")
-                
+                probe = self.analyze_struct_member_access
+            elif next_kind == '[':
+                if _DEBUG:
+                    print(f"Found potential array access: {tokens[original_pos][1]}[...]")
                 # This is an array access - we need to handle it specially
-                element_type = self.analyze_array_element()
+                probe = self.analyze_array_element
+            else:
+                probe = None
+            
+            if probe is not None:
+                operand_type = probe()
                 
                 # If we're at or beyond the end_pos, we're done
                 if self.current_token_index >= end_pos:
-                    return element_type
+                    return operand_type
                 
-                # Otherwise reset position and fall back to regular expression parsing
+                # Otherwise reset position and fall back to regular expression parsing,
+                # which picks this operand's result up again via _take_probed_operand
+                self._probed_operand = (original_pos, operand_type, self.current_token_index)
                 self.current_token_index = original_pos
         
         # Regular expression parsing
-        result_type, has_relational = self._parse_expression(end_pos)
-        print(f"Expression result type: {result_type}, has relational: {has_relational}")
+        self._lookup_cache = {}
+        try:
+            result_type, has_relational = self._parse_expression(end_pos)
+        finally:
+            self._probed_operand = None
+        if _DEBUG:
+            print(f"Expression result type: {result_type}, has relational: {has_relational}")
         return result_type
     
+    def _err(self, message, line, column):
+        """Report a recoverable error. In strict mode this raises SemanticError;
+        otherwise the error is recorded, ERR_TYPE is returned in place of the
+        operand's type, and _fatal is set so the top-level loops stop once the
+        current declaration or function has been analyzed."""
+        error = SemanticError(message, line, column)
+        if self.strict:
+            raise error
+        self._deferred_errors.append(str(error))
+        self._fatal = True
+        return ERR_TYPE
+
+    def _malformed_expression(self, message, line, column, end_pos):
+        """Report an expression that cannot be parsed any further. In strict
+        mode this raises SemanticError; otherwise the error is recorded
+        through _err, the rest of the expression up to end_pos is skipped and
+        (ERR_TYPE, False) is returned as the expression's result."""
+        self._err(message, line, column)
+        self.current_token_index = end_pos
+        return ERR_TYPE, False
+
+    def _take_probed_operand(self):
+        """Return the type of the operand starting at the current token if
+        analyze_expression already analyzed it while probing, moving past it;
+        otherwise return None. The result can only be taken once."""
+        probed = self._probed_operand
+        if probed is None or probed[0] != self.current_token_index:
+            return None
+        self._probed_operand = None
+        self.current_token_index = probed[2]
+        return probed[1]
+
+    def _cached_lookup(self, name):
+        """current_scope.lookup memoized for the expression being parsed (or
+        the for-loop header being checked). analyze_expression and
+        analyze_for_loop start a fresh memo; nothing inside either declares
+        names or changes scope, so it cannot go stale."""
+        symbol = self._lookup_cache.get(name)
+        if symbol is None:
+            symbol = self.current_scope.lookup(name)
+            if symbol is not None:
+                self._lookup_cache[name] = symbol
+        return symbol
+
+    def _literal_expression_type(self, start, end_pos):
+        """Return (type, has_relational_op) for tokens[start:end_pos] when they are
+        literals joined by binary operators, e.g. `1 + 2.50`. Returns None for
+        anything else, including any expression with an error, which is left
+        to the full parser so it can report it."""
+        tokens = self.token_stream
+        if start >= end_pos or end_pos > len(tokens) or (end_pos - start) % 2 == 0:
+            return None
+        current_type = _LITERAL_OPERAND_TYPE.get(tokens[start][0])
+        if current_type is None:
+            return None
+        
+        contains_relational_op = False
+        for i in range(start + 1, end_pos, 2):
+            operator = tokens[i][0]
+            category = _OP_CATEGORY.get(operator)
+            if category is None:
+                return None
+            operand = tokens[i + 1]
+            operand_type = _LITERAL_OPERAND_TYPE.get(operand[0])
+            if operand_type is None or (operator == '/' and operand[1] == '0'):
+                return None
+            result_type = _COMBINE.get((category, current_type, operand_type))
+            if result_type is None:
+                if category != 'eq' or current_type != operand_type:
+                    return None
+                result_type = 'bln'
+            if category == 'rel' or category == 'eq':
+                contains_relational_op = True
+            current_type = result_type
+        
+        return ('bln' if contains_relational_op else current_type), contains_relational_op
+
     def _parse_expression(self, end_pos):
         """
         Parse an expression and return its type and if it contains relational operators.
@@ -2405,6 +2717,23 @@ class SemanticAnalyzer:
         # 2. The current operator (if any)
         # 3. Whether we're expecting an operand or operator
         
+        # Loop-invariant lookups, bound once per call
+        tokens = self.token_stream
+        n = len(tokens)
+        get_token = self.get_current_token
+        advance = self.advance
+        find_matching = self._find_matching
+        op_category = _OP_CATEGORY
+        closed_ops = _CLOSED_OPS
+        literal_types = _LITERAL_OPERAND_TYPE
+        lookup = self._cached_lookup
+
+        # Literals and operators only: no lookups or lookahead needed
+        literal_result = self._literal_expression_type(self.current_token_index, end_pos)
+        if literal_result is not None:
+            self.current_token_index = end_pos
+            return literal_result
+        
         current_type = None
         current_operator = None
         expecting_operand = True
@@ -2412,321 +2741,212 @@ class SemanticAnalyzer:
         # If this is a relational expression, the result is boolean
         contains_relational_op = False
         
-        # Debug output
-        print(f"Parsing expression from position {self.current_token_index} to {end_pos}")
-        # Print tokens being parsed
-        expr_tokens = self.token_stream[self.current_token_index:end_pos]
-        expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
-        print(f"Expression tokens: {expr_str}")
+        if _DEBUG:
+            print(f"Parsing expression from position {self.current_token_index} to {end_pos}")
+            expr_tokens = tokens[self.current_token_index:end_pos]
+            expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
+            print(f"Expression tokens: {expr_str}")
         
         while self.current_token_index < end_pos:
-            token_type, token_value, line, column = self.get_current_token()
-            print(f"Processing token: {token_type} '{token_value}'")
-            
-            # Handle opening parenthesis - parse subexpression
-            if token_type == '(':
-                self.advance()  # Skip over the opening parenthesis
-                
-                # Parse the subexpression - find matching closing parenthesis first
-                subexpr_start = self.current_token_index
-                paren_level = 1
-                subexpr_end = None
-                
-                # Find matching closing parenthesis
-                temp_pos = self.current_token_index
-                while paren_level > 0 and temp_pos < end_pos:
-                    temp_token_type = self.token_stream[temp_pos][0]
-                    if temp_token_type == '(':
-                        paren_level += 1
-                    elif temp_token_type == ')':
-                        paren_level -= 1
-                        if paren_level == 0:
-                            subexpr_end = temp_pos
-                    temp_pos += 1
-                
-                if subexpr_end is None:
-                    raise SemanticError("Unclosed parenthesis", line, column)
-                
-                # Recursively parse the subexpression
-                subexpr_type, subexpr_relational = self._parse_expression(subexpr_end)
-                print(f"Subexpression type: {subexpr_type}, relational: {subexpr_relational}")
-                
-                # Move to position after the closing parenthesis
-                self.current_token_index = subexpr_end + 1
-                
-                # Update current state
-                if current_operator:
-                    # Check compatibility with operator
-                    if current_operator in self.arithmetic_operators:
-                        # Arithmetic operators require numeric operands, allow mixing nt and dbl
-                        if current_type not in ['nt', 'dbl'] or subexpr_type not in ['nt', 'dbl']:
-                            print(f"ERROR: Cannot apply '{current_operator}' to '{current_type}' and '{subexpr_type}'")
-                            raise SemanticError(
-                                f"Type mismatch: Cannot apply '{current_operator}' to '{current_type}' and '{subexpr_type}'",
-                                line, column
-                            )
-                        
-                        # If we mix nt and dbl, the result is dbl
-                        if current_type == 'dbl' or subexpr_type == 'dbl':
-                            current_type = 'dbl'
-                        else:
-                            # Both are nt, result remains nt
-                            current_type = 'nt'
-                            
-                    elif current_operator in self.logical_operators:
-                        # Logical operators require boolean operands
-                        if current_type != 'bln' or subexpr_type != 'bln':
-                            print(f"ERROR: Cannot apply '{current_operator}' to '{current_type}' and '{subexpr_type}'")
-                            raise SemanticError(
-                                f"Type mismatch: Cannot apply '{current_operator}' to '{current_type}' and '{subexpr_type}'",
-                                line, column
-                            )
-                        # Result is boolean
-                        current_type = 'bln'
-                    elif current_operator in self.relational_operators:
-                        # Relational operators behavior depends on specific operator
-                        if current_operator in self.equality_operators:
-                            # == and != work for all types, but both operands must be same type
-                            # However, we'll allow comparing nt with dbl
-                            if current_type != subexpr_type:
-                                # Allow comparing nt with dbl
-                                if not ((current_type == 'nt' and subexpr_type == 'dbl') or 
-                                    (current_type == 'dbl' and subexpr_type == 'nt')):
-                                    print(f"ERROR: Cannot compare '{current_type}' with '{subexpr_type}'")
-                                    raise SemanticError(
-                                        f"Type mismatch: Cannot compare '{current_type}' with '{subexpr_type}'",
-                                        line, column
-                                    )
-                        else:
-                            # <, >, <=, >= only work for numeric types - now allow mixing nt and dbl
-                            if current_type not in ['nt', 'dbl'] or subexpr_type not in ['nt', 'dbl']:
-                                print(f"ERROR: Cannot apply '{current_operator}' to '{current_type}' and '{subexpr_type}'")
-                                raise SemanticError(
-                                    f"Type mismatch: Cannot apply '{current_operator}' to '{current_type}' and '{subexpr_type}'",
-                                    line, column
-                                )
-                        
-                        # Result is boolean
-                        current_type = 'bln'
-                        contains_relational_op = True
-                    elif current_operator in self.string_concat_operator:
-                        # String concatenation requires string operands
-                        if current_type != 'strng' or subexpr_type != 'strng':
-                            print(f"ERROR: Cannot concatenate '{current_type}' with '{subexpr_type}'")
-                            raise SemanticError(
-                                f"Type mismatch: Cannot concatenate '{current_type}' with '{subexpr_type}'",
-                                line, column
-                            )
-                        # Result is string
-                        current_type = 'strng'
-                    
-                    # Reset operator after applying it
-                    current_operator = None
-                    expecting_operand = False
-                else:
-                    # This is the first operand
-                    current_type = subexpr_type
-                    contains_relational_op = contains_relational_op or subexpr_relational
-                    expecting_operand = False
-                
-                # Update relational operator flag
-                contains_relational_op = contains_relational_op or subexpr_relational
-                
-                continue
+            index = self.current_token_index
+            if index < n:
+                token_type, token_value, line, column = tokens[index]
+            else:
+                token_type, token_value, line, column = None, None, None, None
+            if _DEBUG:
+                print(f"Processing token: {token_type} '{token_value}'")
             
             # Handle operands (values, variables, function calls, struct member access)
             if expecting_operand:
-                operand_type = None
+                # Literal operands need only their token type
+                operand_type = literal_types.get(token_type)
+                if operand_type is not None:
+                    if current_operator == '/' and token_value == '0' and operand_type in _NUMERIC_TYPES:
+                        raise SemanticError(f"Division by zero detected", line, column)
+                    self.current_token_index = index + 1
 
+                # Handle opening parenthesis - parse subexpression
+                elif token_type == '(':
+                    self.current_token_index = index + 1  # Skip over the opening parenthesis
+                    
+                    # Parse the subexpression - its matching ')' must lie inside this expression
+                    subexpr_end = find_matching(index, end_pos, "Unclosed parenthesis", line, column)
+                    
+                    # Recursively parse the subexpression
+                    operand_type, subexpr_relational = self._parse_expression(subexpr_end)
+                    if _DEBUG:
+                        print(f"Subexpression type: {operand_type}, relational: {subexpr_relational}")
+                    
+                    # Move to position after the closing parenthesis
+                    self.current_token_index = subexpr_end + 1
+                    
+                    # Update relational operator flag
+                    if subexpr_relational:
+                        contains_relational_op = True
+                
                  # Handle pre-increment/decrement operators
-                if token_type in ['++', '--']:
-                    print(f"Found pre-{token_type} operator")
+                elif token_type in _INCDEC_OPERATORS:
+                    if _DEBUG:
+                        print(f"Found pre-{token_type} operator")
                     pre_op = token_type
-                    self.advance()  # Move past the operator
+                    advance()  # Move past the operator
                     
                     # Must be followed by an identifier
-                    if self.get_current_token()[0] != 'id':
-                        print(f"ERROR: {pre_op} must be followed by an identifier")
+                    var_token = get_token()
+                    if var_token[0] != 'id':
+                        if _DEBUG:
+                            print(f"ERROR: {pre_op} must be followed by an identifier")
                         raise SemanticError(f"{pre_op} operator must be followed by an identifier", line, column)
                     
-                    var_name = self.get_current_token()[1]
-                    var_line, var_column = self.get_current_token()[2], self.get_current_token()[3]
+                    var_name = var_token[1]
+                    var_line, var_column = var_token[2], var_token[3]
                     
                     # Check if variable exists
-                    symbol = self.current_scope.lookup(var_name)
+                    symbol = lookup(var_name)
                     if not symbol:
-                        print(f"ERROR: Undefined variable '{var_name}'")
+                        if _DEBUG:
+                            print(f"ERROR: Undefined variable '{var_name}'")
                         raise SemanticError(f"Undefined variable '{var_name}'", var_line, var_column)
                     
                     # Check if variable is of type 'nt'
-                    if symbol.data_type != 'nt':
-                        print(f"ERROR: {pre_op} operator can only be applied to 'nt' variables, not '{symbol.data_type}'")
+                    if not symbol.is_nt:
+                        if _DEBUG:
+                            print(f"ERROR: {pre_op} operator can only be applied to 'nt' variables, not '{symbol.data_type}'")
                         raise SemanticError(f"{pre_op} operator can only be applied to 'nt' variables, not '{symbol.data_type}'", 
                                         var_line, var_column)
                     
                     # Pre-increment/decrement returns the modified value
                     operand_type = 'nt'
-                    self.advance()  # Move past the variable name
+                    advance()  # Move past the variable name
                 
                 # Determine the type of the current operand
-                elif token_type in ['ntlit', '~ntlit']:
-                    operand_type = 'nt'
-                    if current_operator == '/' and token_value == '0':
-                        raise SemanticError(f"Division by zero detected", line, column)
-                    self.advance()
-                elif token_type in ['dbllit', '~dbllit']:
-                    operand_type = 'dbl'
-                    if current_operator == '/' and token_value == '0':
-                        raise SemanticError(f"Division by zero detected", line, column)
-                    self.advance()
-                elif token_type in ['true', 'false', 'blnlit']:
-                    operand_type = 'bln'
-                    self.advance()
-                elif token_type == 'chrlit':
-                    operand_type = 'chr'
-                    self.advance()
-                elif token_type == 'strnglit':
-                    operand_type = 'strng'
-                    self.advance()
                 elif token_type == 'id':
-                    # Save position for lookahead
-                    save_pos = self.current_token_index
                     var_name = token_value
                     
-                    # Look ahead to see what follows the identifier
-                    self.advance()
-                    if self.current_token_index < end_pos:
-                        next_token = self.get_current_token()[0]
+                    # Look ahead to see what follows the identifier, without moving
+                    next_pos = index + 1
+                    if next_pos < end_pos:
+                        next_token = tokens[next_pos][0] if next_pos < n else None
 
                         # Check for array access: id[...]
                         if next_token == '[':
-                            print(f"Found array access in expression: {var_name}[...]")
-                            # Go back to array name
-                            self.current_token_index = save_pos
+                            if _DEBUG:
+                                print(f"Found array access in expression: {var_name}[...]")
                             
                             # Get array element type
-                            operand_type = self.analyze_array_element()
-                            print(f"Array element type in expression: {operand_type}")
+                            operand_type = self._take_probed_operand()
+                            if operand_type is None:
+                                operand_type = self.analyze_array_element()
+                            if _DEBUG:
+                                print(f"Array element type in expression: {operand_type}")
                         
                         # Check for post-increment or post-decrement
-                        elif next_token in ['++', '--']:
+                        elif next_token in _INCDEC_OPERATORS:
                             # These operators can only be applied to 'nt' variables
-                            symbol = self.current_scope.lookup(var_name)
+                            symbol = lookup(var_name)
                             if not symbol:
                                 raise SemanticError(f"Undefined variable '{var_name}'", line, column)
                             
-                            if symbol.data_type != 'nt':
-                                print(f"ERROR: Increment/decrement only applies to 'nt' variables, not '{symbol.data_type}'")
+                            if not symbol.is_nt:
+                                if _DEBUG:
+                                    print(f"ERROR: Increment/decrement only applies to 'nt' variables, not '{symbol.data_type}'")
                                 raise SemanticError(f"Increment/decrement operators can only be applied to 'nt' variables, not '{symbol.data_type}'", 
                                                 line, column)
                             
                             operand_type = 'nt'
-                            self.advance()  # Move past the operator
+                            self.current_token_index = next_pos + 1  # Move past the operator
                         
                         # Check for function call: id(...)
                         elif next_token == '(':
                             # This is a function call within an expression
-                            # Go back to function name
-                            self.current_token_index = save_pos
                             
                             # Process function call and get its return type
-                            operand_type = self.analyze_function_call()
+                            operand_type = self._take_probed_operand()
+                            if operand_type is None:
+                                operand_type = self.analyze_function_call()
                             
                             # If the function is void, it can't be used in an expression
                             if operand_type == 'vd':
-                                print(f"ERROR: Void function '{var_name}' cannot be used in expression")
+                                if _DEBUG:
+                                    print(f"ERROR: Void function '{var_name}' cannot be used in expression")
                                 raise SemanticError(f"Void function '{var_name}' cannot be used in an expression", line, column)
                         
                         # Check for struct member access: id.member
                         elif next_token == '.':
-                            print(f"Processing struct member access in _parse_expression: {var_name}.{self.token_stream[self.current_token_index+1][1]}")
+                            if _DEBUG:
+                                print(f"Processing struct member access in _parse_expression: {var_name}.{tokens[next_pos + 1][1]}")
                             # This is a struct member access
-                            # Go back to struct instance name
-                            self.current_token_index = save_pos
                             
                             # Process struct member access and get its type
-                            operand_type = self.analyze_struct_member_access()
+                            operand_type = self._take_probed_operand()
+                            if operand_type is None:
+                                operand_type = self.analyze_struct_member_access()
                         
                         else:
                             # Not a function call or struct member access, just a variable reference
-                            self.current_token_index = save_pos
                             
                             # Get type from symbol table
-                            symbol = self.current_scope.lookup(var_name)
+                            symbol = lookup(var_name)
                             if not symbol:
-                                print(f"ERROR: Undefined variable '{var_name}'")
-                                raise SemanticError(f"Undefined variable '{var_name}'", line, column)
-                            
-                            # Check if it's a function being used without parentheses
-                            if symbol.type == 'function':
-                                print(f"ERROR: Function '{var_name}' used without parentheses")
-                                raise SemanticError(f"Function '{var_name}' used without parentheses", line, column)
-                            
-                            # Check if variable is initialized
-                            if not symbol.initialized:
-                                print(f"Warning: Variable '{var_name}' may be used before initialization at line {line}, column {column}")
-                            
-                            operand_type = symbol.data_type
-                            self.advance()
+                                if _DEBUG:
+                                    print(f"ERROR: Undefined variable '{var_name}'")
+                                operand_type = self._err(f"Undefined variable '{var_name}'", line, column)
+                            else:
+                                # Check if it's a function being used without parentheses
+                                if symbol.is_function:
+                                    if _DEBUG:
+                                        print(f"ERROR: Function '{var_name}' used without parentheses")
+                                    raise SemanticError(f"Function '{var_name}' used without parentheses", line, column)
+                                
+                                # Check if variable is initialized
+                                if not symbol.initialized:
+                                    if _DEBUG:
+                                        print(f"Warning: Variable '{var_name}' may be used before initialization at line {line}, column {column}")
+                                
+                                operand_type = symbol.data_type
+                            self.current_token_index = index + 1
                     else:
                         # We're at the end - treat as variable reference
-                        self.current_token_index = save_pos
                         
                         # Get type from symbol table
-                        symbol = self.current_scope.lookup(var_name)
+                        symbol = lookup(var_name)
                         if not symbol:
-                            print(f"ERROR: Undefined variable '{var_name}'")
-                            raise SemanticError(f"Undefined variable '{var_name}'", line, column)
-                        
-                        operand_type = symbol.data_type
-                        self.advance()
+                            if _DEBUG:
+                                print(f"ERROR: Undefined variable '{var_name}'")
+                            operand_type = self._err(f"Undefined variable '{var_name}'", line, column)
+                        else:
+                            operand_type = symbol.data_type
+                        self.current_token_index = index + 1
                 elif token_type == '!':
                     # Logical NOT operator
-                    self.advance()  # Skip !
+                    advance()  # Skip !
                     
                     # Track number of consecutive NOT operators
                     not_count = 1
-                    while self.current_token_index < end_pos and self.token_stream[self.current_token_index][0] == '!':
+                    while self.current_token_index < end_pos and tokens[self.current_token_index][0] == '!':
                         not_count += 1
-                        self.advance()  # Skip additional ! operators
+                        advance()  # Skip additional ! operators
                     
                     # Handle subexpression after the series of ! operators
                     if self.current_token_index < end_pos:
-                        next_token_type = self.token_stream[self.current_token_index][0]
-                        next_token_value = self.token_stream[self.current_token_index][1]
-                        next_line = self.token_stream[self.current_token_index][2]
-                        next_column = self.token_stream[self.current_token_index][3]
+                        next_token_type, next_token_value, next_line, next_column = tokens[self.current_token_index]
                         
                         if next_token_type == '(':
                             # Process parenthesized expression after !
-                            self.advance()  # Skip (
-                            
-                            # Find closing parenthesis
-                            start_pos = self.current_token_index
-                            paren_level = 1
-                            while paren_level > 0 and self.current_token_index < end_pos:
-                                self.advance()
-                                if self.current_token_index >= len(self.token_stream):
-                                    raise SemanticError("Unclosed parenthesis after '!'", line, column)
-                                
-                                current_token = self.token_stream[self.current_token_index][0]
-                                if current_token == '(':
-                                    paren_level += 1
-                                elif current_token == ')':
-                                    paren_level -= 1
+                            advance()  # Skip (
                             
-                            # Current token is now at the closing parenthesis
-                            subexpr_end = self.current_token_index
-                            self.current_token_index = start_pos
+                            # Find closing parenthesis - it must lie inside this expression
+                            subexpr_end = find_matching(self.current_token_index - 1, end_pos, "Unclosed parenthesis after '!'", line, column)
                             
                             # Parse the subexpression
                             subexpr_type, _ = self._parse_expression(subexpr_end)
                             
                             # Skip the closing parenthesis
-                            self.advance()
+                            advance()
                             
-                            if subexpr_type != 'bln':
-                                print(f"ERROR: Cannot apply '!' to non-boolean type '{subexpr_type}'")
+                            if subexpr_type != 'bln' and subexpr_type != ERR_TYPE:
+                                if _DEBUG:
+                                    print(f"ERROR: Cannot apply '!' to non-boolean type '{subexpr_type}'")
                                 raise SemanticError(f"Type mismatch: Cannot apply '!' to non-boolean type '{subexpr_type}'", line, column)
                             
                             # The result is always boolean, regardless of how many ! operators
@@ -2737,113 +2957,60 @@ class SemanticAnalyzer:
                             # Not a parenthesized expression - check the identifier or literal
                             if next_token_type == 'id':
                                 # Variable reference
-                                symbol = self.current_scope.lookup(next_token_value)
+                                symbol = lookup(next_token_value)
                                 if not symbol:
-                                    print(f"ERROR: Undefined variable '{next_token_value}'")
-                                    raise SemanticError(f"Undefined variable '{next_token_value}'", next_line, next_column)
-                                
-                                subexpr_type = symbol.data_type
-                            elif next_token_type in ['true', 'false', 'blnlit']:
+                                    if _DEBUG:
+                                        print(f"ERROR: Undefined variable '{next_token_value}'")
+                                    subexpr_type = self._err(f"Undefined variable '{next_token_value}'", next_line, next_column)
+                                else:
+                                    subexpr_type = symbol.data_type
+                            elif next_token_type in _BLN_LITERALS:
                                 subexpr_type = 'bln'
                             else:
                                 # For other token types, get their corresponding type
                                 subexpr_type = self.get_token_type(next_token_type)
                             
-                            if subexpr_type != 'bln':
-                                print(f"ERROR: Cannot apply '!' to non-boolean type '{subexpr_type}'")
+                            if subexpr_type != 'bln' and subexpr_type != ERR_TYPE:
+                                if _DEBUG:
+                                    print(f"ERROR: Cannot apply '!' to non-boolean type '{subexpr_type}'")
                                 raise SemanticError(f"Type mismatch: Cannot apply '!' to non-boolean type '{subexpr_type}'", next_line, next_column)
                             
-                            self.advance()  # Skip the operand
+                            advance()  # Skip the operand
                             current_type = 'bln'
                         
                         expecting_operand = False
                         
                     else:
                         # No operand after ! operator
-                        raise SemanticError("Unexpected end of expression after '!'", line, column)
+                        return self._malformed_expression("Unexpected end of expression after '!'", line, column, end_pos)
                     
                     operand_type = 'bln'
                     current_type = operand_type 
                     expecting_operand = False
                     continue
                 elif token_type == 'npt':
-                    print(f"Found npt function in expression")
+                    if _DEBUG:
+                        print(f"Found npt function in expression")
                     # This is a built-in function for input
                     # Use our function call analyzer which now handles npt
                     operand_type = self.analyze_function_call()
                 else:
                     # Unknown token in expression
-                    print(f"ERROR: Unexpected token '{token_type}' in expression")
-                    raise SemanticError(f"Unexpected token '{token_type}' in expression", line, column)
+                    if _DEBUG:
+                        print(f"ERROR: Unexpected token '{token_type}' in expression")
+                    return self._malformed_expression(f"Unexpected token '{token_type}' in expression", line, column, end_pos)
                 
                 # Handle the operand in context
                 if current_type is None:
                     # This is the first operand
                     current_type = operand_type
                 elif current_operator:
-                    # This is a right operand - check compatibility with operator and left operand
-                    if current_operator in self.arithmetic_operators:
-                        # Arithmetic operators require numeric operands - now allow mixing nt and dbl
-                        if current_type not in ['nt', 'dbl'] or operand_type not in ['nt', 'dbl']:
-                            print(f"ERROR: Cannot apply '{current_operator}' to '{current_type}' and '{operand_type}'")
-                            raise SemanticError(
-                                f"Type mismatch: Cannot apply '{current_operator}' to '{current_type}' and '{operand_type}'",
-                                line, column
-                            )
-                        
-                        # If we mix nt and dbl, the result is dbl
-                        if current_type == 'dbl' or operand_type == 'dbl':
-                            current_type = 'dbl'
-                        else:
-                            # Both are nt, result remains nt
-                            current_type = 'nt'
-                            
-                    elif current_operator in self.logical_operators:
-                        # Logical operators require boolean operands
-                        if current_type != 'bln' or operand_type != 'bln':
-                            print(f"ERROR: Cannot apply '{current_operator}' to '{current_type}' and '{operand_type}'")
-                            raise SemanticError(
-                                f"Type mismatch: Cannot apply '{current_operator}' to '{current_type}' and '{operand_type}'",
-                                line, column
-                            )
-                        # Result is boolean
-                        current_type = 'bln'
-                    elif current_operator in self.relational_operators:
-                        # Relational operators behavior depends on specific operator
-                        if current_operator in self.equality_operators:
-                            # == and != work for all types, but operands must match
-                            # However, we'll allow comparing nt with dbl
-                            if current_type != operand_type:
-                                # Allow comparing nt with dbl
-                                if not ((current_type == 'nt' and operand_type == 'dbl') or 
-                                    (current_type == 'dbl' and operand_type == 'nt')):
-                                    print(f"ERROR: Cannot compare '{current_type}' with '{operand_type}'")
-                                    raise SemanticError(
-                                        f"Type mismatch: Cannot compare '{current_type}' with '{operand_type}'",
-                                        line, column
-                                    )
-                        else:
-                            # <, >, <=, >= only work for numeric types - now allow mixing nt and dbl
-                            if current_type not in ['nt', 'dbl'] or operand_type not in ['nt', 'dbl']:
-                                print(f"ERROR: Cannot apply '{current_operator}' to '{current_type}' and '{operand_type}'")
-                                raise SemanticError(
-                                    f"Type mismatch: Cannot apply '{current_operator}' to '{current_type}' and '{operand_type}'",
-                                    line, column
-                                )
-                        
-                        # Result is always boolean
-                        current_type = 'bln'
-                        contains_relational_op = True
-                    elif current_operator in self.string_concat_operator:
-                        # String concatenation requires string operands
-                        if current_type != 'strng' or operand_type != 'strng':
-                            print(f"ERROR: Cannot concatenate '{current_type}' with '{operand_type}'")
-                            raise SemanticError(
-                                f"Type mismatch: Cannot concatenate '{current_type}' with '{operand_type}'",
-                                line, column
-                            )
-                        # Result is string
-                        current_type = 'strng'
+                    # This is a right operand - check compatibility with operator and left operand.
+                    # bln && bln, bln || bln and strng ` strng keep their type with no table lookup.
+                    # (A relational operator already set contains_relational_op when it was read.)
+                    closed_type = closed_ops.get(current_operator)
+                    if closed_type is None or current_type != closed_type or operand_type != closed_type:
+                        current_type = self._apply_binop(current_operator, current_type, operand_type, line, column)
                     
                     # Clear the operator now that it's been applied
                     current_operator = None
@@ -2852,98 +3019,114 @@ class SemanticAnalyzer:
             
             # Handle operators
             else:
-                if token_type in self.arithmetic_operators:
-                    # Verify current type supports arithmetic
-                    if current_type not in ['nt', 'dbl']:
-                        print(f"ERROR: Cannot apply arithmetic operator '{token_type}' to '{current_type}'")
+                category = op_category.get(token_type)
+                if category is None:
+                    if token_type == ')':
+                        # This should be handled by the parenthesis processing logic
+                        # If we encounter a closing parenthesis here, it means it's not balanced properly
+                        if _DEBUG:
+                            print(f"ERROR: Unexpected closing parenthesis")
+                        return self._malformed_expression(f"Unexpected closing parenthesis", line, column, end_pos)
+                    # Unknown operator
+                    if _DEBUG:
+                        print(f"ERROR: Unexpected token '{token_type}' in expression")
+                    return self._malformed_expression(f"Unexpected token '{token_type}' in expression", line, column, end_pos)
+                
+                # Verify the left operand supports the operator
+                if current_type == ERR_TYPE:
+                    # Its error has already been reported
+                    pass
+                elif category == 'arith' or category == 'rel':
+                    # Arithmetic and <, >, <=, >= only work with numeric types
+                    if current_type not in _NUMERIC_TYPES:
+                        if _DEBUG:
+                            print(f"ERROR: Cannot apply {'arithmetic' if category == 'arith' else 'relational'} operator '{token_type}' to '{current_type}'")
                         raise SemanticError(
                             f"Type mismatch: Cannot apply '{token_type}' to '{current_type}'",
                             line, column
                         )
-                    current_operator = token_type
-                    expecting_operand = True
-                    self.advance()
-                elif token_type in self.logical_operators:
+                elif category == 'logical':
                     # Verify current type is boolean
                     if current_type != 'bln':
-                        print(f"ERROR: Cannot apply logical operator '{token_type}' to '{current_type}'")
+                        if _DEBUG:
+                            print(f"ERROR: Cannot apply logical operator '{token_type}' to '{current_type}'")
                         raise SemanticError(
                             f"Type mismatch: Cannot apply '{token_type}' to '{current_type}'",
                             line, column
                         )
-                    current_operator = token_type
-                    expecting_operand = True
-                    self.advance()
-                elif token_type in self.relational_operators:
-                    # For relational operators, verify based on specific operator
-                    if token_type in self.equality_operators:
-                        # == and != work for all types
-                        # No additional checks needed here, will check type match with right operand
-                        pass
-                    else:
-                        # <, >, <=, >= only work with numeric types
-                        if current_type not in ['nt', 'dbl']:
-                            print(f"ERROR: Cannot apply relational operator '{token_type}' to '{current_type}'")
-                            raise SemanticError(
-                                f"Type mismatch: Cannot apply '{token_type}' to '{current_type}'",
-                                line, column
-                            )
-                    
-                    # Store the relational operator
-                    current_operator = token_type
-                    contains_relational_op = True
-                    expecting_operand = True
-                    self.advance()
-                elif token_type == '`':
+                elif category == 'concat':
                     # String concatenation operator
                     if current_type != 'strng':
-                        print(f"ERROR: Cannot apply string concatenation to non-string type '{current_type}'")
+                        if _DEBUG:
+                            print(f"ERROR: Cannot apply string concatenation to non-string type '{current_type}'")
                         raise SemanticError(
                             f"Type mismatch: Cannot apply '`' to non-string type '{current_type}'",
                             line, column
                         )
-                    current_operator = token_type
-                    expecting_operand = True
-                    self.advance()
-                elif token_type == ')':
-                    # This should be handled by the parenthesis processing logic
-                    # If we encounter a closing parenthesis here, it means it's not balanced properly
-                    print(f"ERROR: Unexpected closing parenthesis")
-                    raise SemanticError(f"Unexpected closing parenthesis", line, column)
-                else:
-                    # Unknown operator
-                    print(f"ERROR: Unexpected token '{token_type}' in expression")
-                    raise SemanticError(f"Unexpected token '{token_type}' in expression", line, column)
+                # == and != work for all types; the right operand is checked in _apply_binop
+                
+                if category == 'rel' or category == 'eq':
+                    contains_relational_op = True
+                current_operator = token_type
+                expecting_operand = True
+                self.current_token_index = index + 1
         
         if expecting_operand:
-            print(f"ERROR: Incomplete expression: expecting operand")
-            raise SemanticError("Incomplete expression: expecting operand", line, column)
+            if _DEBUG:
+                print(f"ERROR: Incomplete expression: expecting operand")
+            return self._malformed_expression("Incomplete expression: expecting operand", line, column, end_pos)
         
         # If we have a pending operator, that's an error
         if current_operator:
-            print(f"ERROR: Incomplete expression: missing right operand for '{current_operator}'")
-            raise SemanticError(f"Incomplete expression: missing right operand for '{current_operator}'", line, column)
+            if _DEBUG:
+                print(f"ERROR: Incomplete expression: missing right operand for '{current_operator}'")
+            return self._malformed_expression(f"Incomplete expression: missing right operand for '{current_operator}'", line, column, end_pos)
         
         # Print final result for debugging
-        print(f"Expression final type: {current_type}, contains relational: {contains_relational_op}")
+        if _DEBUG:
+            print(f"Expression final type: {current_type}, contains relational: {contains_relational_op}")
         
         # If expression contains a relational operator, result is boolean
-        if contains_relational_op:
-            return 'bln', True
-        
-        return current_type, contains_relational_op
+        return ('bln' if contains_relational_op else current_type), contains_relational_op
+
+    def _apply_binop(self, operator, left_type, right_type, line, column):
+        """Type-check `left_type operator right_type` using _COMBINE and return the result type."""
+        category = _OP_CATEGORY.get(operator)
+        if category is None:
+            return left_type
+        if left_type == ERR_TYPE or right_type == ERR_TYPE:
+            return ERR_TYPE
+        result_type = _COMBINE.get((category, left_type, right_type))
+        if result_type is not None:
+            return result_type
+        if category == 'eq':
+            # == and != work for all types, but both operands must be the same type
+            if left_type == right_type:
+                return 'bln'
+            if _DEBUG:
+                print(f"ERROR: Cannot compare '{left_type}' with '{right_type}'")
+            raise SemanticError(f"Type mismatch: Cannot compare '{left_type}' with '{right_type}'", line, column)
+        if category == 'concat':
+            message = f"Type mismatch: Cannot concatenate '{left_type}' with '{right_type}'"
+        else:
+            message = f"Type mismatch: Cannot apply '{operator}' to '{left_type}' and '{right_type}'"
+        if _DEBUG:
+            print(f"ERROR: {message}")
+        raise SemanticError(message, line, column)
 
     def analyze_array_element(self):
         """
         Analyze an array element access expression and return the element type.
         Used for expressions like arr[1] when they appear on right side of assignments.
         """
+        n = len(self.token_stream)
         # Get array name
         token_type, var_name, line, column = self.get_current_token()
         if token_type != 'id':
             raise SemanticError(f"Expected array identifier, got {token_type}", line, column)
         
-        print(f"Analyzing array element access for '{var_name}' at line {line}, column {column}")
+        if _DEBUG:
+            print(f"Analyzing array element access for '{var_name}' at line {line}, column {column}")
         
         # Check if variable exists
         symbol = self.current_scope.lookup(var_name)
@@ -2966,35 +3149,26 @@ class SemanticAnalyzer:
         # Save the current index token for bounds checking
         index1_token_type, index1_value, index1_line, index1_column = self.get_current_token()
         
-        # Find the end of this index expression (should be the closing bracket)
-        start_pos = self.current_token_index
-        bracket_level = 1
-        
-        while bracket_level > 0 and self.current_token_index < len(self.token_stream):
-            self.current_token_index += 1
-            if self.current_token_index >= len(self.token_stream):
-                raise SemanticError("Unclosed bracket", line, column)
-            
-            current_token = self.token_stream[self.current_token_index][0]
-            if current_token == '[':
-                bracket_level += 1
-            elif current_token == ']':
-                bracket_level -= 1
-        
+        # Find the end of this index expression (the matching closing bracket)
         end_pos = self.current_token_index
-        self.current_token_index = start_pos
+        if end_pos < n:
+            end_pos = self._find_matching(end_pos - 1, n, "Unclosed bracket", line, column)
+            if end_pos == self.current_token_index:
+                raise SemanticError("Expected array index expression, got ']'",
+                                self.token_stream[end_pos][2], self.token_stream[end_pos][3])
         
         # Validate index expression is of type nt
         index1_type = self.analyze_expression(end_pos)
-        if index1_type != 'nt':
+        if not self.is_compatible_type('nt', index1_type):
             raise SemanticError(f"Array index must be of type 'nt', got '{index1_type}'", 
                             index1_line, index1_column)
         
         # Check bounds if index is a literal
-        if index1_token_type == 'ntlit' and isinstance(symbol.array_sizes[0], int):
+        size = symbol.static_sizes[0]
+        if index1_token_type == 'ntlit' and size is not None:
             index1 = int(index1_value)
-            if index1 < 0 or index1 >= symbol.array_sizes[0]:
-                raise SemanticError(f"Array index {index1} out of bounds (size {symbol.array_sizes[0]})",
+            if index1 < 0 or index1 >= size:
+                raise SemanticError(f"Array index {index1} out of bounds (size {size})",
                             index1_line, index1_column)
         
         if self.get_current_token()[0] != ']':
@@ -3014,35 +3188,26 @@ class SemanticAnalyzer:
             # Save the current index token for bounds checking
             index2_token_type, index2_value, index2_line, index2_column = self.get_current_token()
             
-            # Find the end of this index expression (should be the closing bracket)
-            start_pos = self.current_token_index
-            bracket_level = 1
-            
-            while bracket_level > 0 and self.current_token_index < len(self.token_stream):
-                self.current_token_index += 1
-                if self.current_token_index >= len(self.token_stream):
-                    raise SemanticError("Unclosed bracket", line, column)
-                
-                current_token = self.token_stream[self.current_token_index][0]
-                if current_token == '[':
-                    bracket_level += 1
-                elif current_token == ']':
-                    bracket_level -= 1
-            
+            # Find the end of this index expression (the matching closing bracket)
             end_pos = self.current_token_index
-            self.current_token_index = start_pos
+            if end_pos < n:
+                end_pos = self._find_matching(end_pos - 1, n, "Unclosed bracket", line, column)
+                if end_pos == self.current_token_index:
+                    raise SemanticError("Expected array index expression, got ']'",
+                                    self.token_stream[end_pos][2], self.token_stream[end_pos][3])
             
             # Validate index expression is of type nt
             index2_type = self.analyze_expression(end_pos)
-            if index2_type != 'nt':
+            if not self.is_compatible_type('nt', index2_type):
                 raise SemanticError(f"Array index must be of type 'nt', got '{index2_type}'", 
                                 index2_line, index2_column)
             
             # Check bounds if index is a literal
-            if index2_token_type == 'ntlit' and isinstance(symbol.array_sizes[1], int):
+            size = symbol.static_sizes[1]
+            if index2_token_type == 'ntlit' and size is not None:
                 index2 = int(index2_value)
-                if index2 < 0 or index2 >= symbol.array_sizes[1]:
-                    raise SemanticError(f"Array index {index2} out of bounds (size {symbol.array_sizes[1]})",
+                if index2 < 0 or index2 >= size:
+                    raise SemanticError(f"Array index {index2} out of bounds (size {size})",
                                     index2_line, index2_column)
             
             if self.get_current_token()[0] != ']':
@@ -3052,32 +3217,30 @@ class SemanticAnalyzer:
             self.advance()  # Move past ']'
         
         # Return the data type of the array element
-        print(f"Array element type: {symbol.data_type}")
+        if _DEBUG:
+            print(f"Array element type: {symbol.data_type}")
         return symbol.data_type
     
     def is_compatible_type(self, declared_type, value_type):
         """Check if value type is compatible with declared type"""
-        # Map literal types to their corresponding data types
-        if value_type in ('ntlit', '~ntlit'):
-            return declared_type == 'nt'
-        elif value_type in ('dbllit', '~dbllit'):
-            return declared_type == 'dbl'
-        elif value_type in ('true', 'false', 'blnlit'):
-            return declared_type == 'bln'
-        elif value_type == 'chrlit':
-            return declared_type == 'chr'
-        elif value_type == 'strnglit':
-            return declared_type == 'strng'
-        
-        # Handle exact type matching (no type conversion)
-        return declared_type == value_type
+        if value_type == ERR_TYPE:
+            # The value's own error has already been reported
+            return True
+        # Literal types map to their data type; anything else must match
+        # exactly (no type conversion)
+        return declared_type == _LITERAL_OPERAND_TYPE.get(value_type, value_type)
 
     def analyze_assignment(self):
         """Analyze variable assignment including shortcut assignment operators"""
-        var_token_type, var_name, line, column = self.get_current_token()
+        # Tokens are read straight from the stream here rather than through
+        # get_current_token, falling back to _NO_TOKEN past the end
+        tokens = self.token_stream
+        n = len(tokens)
+        i = self.current_token_index
+        var_token_type, var_name, line, column = tokens[i] if i < n else _NO_TOKEN
         
-        # Debug output
-        print(f"Analyzing assignment for variable '{var_name}' at line {line}, column {column}")
+        if _DEBUG:
+            print(f"Analyzing assignment for variable '{var_name}' at line {line}, column {column}")
         
         # Check if variable exists
         symbol = self.current_scope.lookup(var_name)
@@ -3085,43 +3248,50 @@ class SemanticAnalyzer:
             raise SemanticError(f"Variable '{var_name}' not declared", line, column)
         
         var_type = symbol.data_type
-        print(f"Variable '{var_name}' has type '{var_type}'")
+        if _DEBUG:
+            print(f"Variable '{var_name}' has type '{var_type}'")
         
         # Check if this is a constant
         if symbol.is_constant:
             raise SemanticError(f"Cannot reassign constant '{var_name}'", line, column)
         
         # Move past variable name
-        self.advance()
+        i += 1
+        self.current_token_index = i
         
         # Check which assignment operator is being used
-        token_type, token_value, op_line, op_column = self.get_current_token()
-        print(f"Assignment operator: {token_type}")
+        token_type, token_value, op_line, op_column = tokens[i] if i < n else _NO_TOKEN
+        if _DEBUG:
+            print(f"Assignment operator: {token_type}")
+        op_kind = _ASSIGN_OP_KIND.get(token_type)
         
         # Handle increment/decrement operators (++, --)
-        if token_type in ['++', '--']:
+        if op_kind == 'incdec':
             # These operators can only be applied to 'nt' variables
             if var_type != 'nt':
                 raise SemanticError(f"Increment/decrement operators can only be applied to 'nt' variables, not '{var_type}'", 
                                 op_line, op_column)
             
-            self.advance()  # Move past the operator
+            i += 1  # Move past the operator
             
             # Check for semicolon
-            if self.get_current_token()[0] != ';':
+            semi_token = tokens[i] if i < n else _NO_TOKEN
+            if semi_token[0] != ';':
+                self.current_token_index = i
                 raise SemanticError(f"Expected ';' after increment/decrement operation", 
-                                self.get_current_token()[2], self.get_current_token()[3])
+                                semi_token[2], semi_token[3])
             
-            self.advance()  # Move past semicolon
+            self.current_token_index = i + 1  # Move past semicolon
             symbol.initialized = True
             return
         
         # Handle compound assignment operators (+=, -=, *=, /=, %=)
-        if token_type in ['+=', '-=', '*=', '/=', '%=']:
-            print(f"Processing shortcut assignment operator '{token_type}'")
+        if op_kind == 'compound':
+            if _DEBUG:
+                print(f"Processing shortcut assignment operator '{token_type}'")
             
             # These operators require numeric operands for variable
-            if var_type not in ['nt', 'dbl']:
+            if var_type not in _NUMERIC_TYPES:
                 raise SemanticError(f"Shortcut assignment operator '{token_type}' can only be applied to numeric types, not '{var_type}'", 
                                 op_line, op_column)
             
@@ -3130,26 +3300,24 @@ class SemanticAnalyzer:
             # Save starting position for expression analysis
             start_pos = self.current_token_index
             
-            # Skip ahead to find the end of the expression (semicolon)
-            while (self.current_token_index < len(self.token_stream) and 
-                self.token_stream[self.current_token_index][0] != ';'):
-                self.advance()
+            # The end of the expression is the next semicolon, read from the
+            # precomputed ';' table so the cursor never has to walk there and back
+            end_pos = start_pos
+            if start_pos < len(self.token_stream):
+                end_pos = self._next_index_table(';')[start_pos]
             
-            # Reset position to start of expression
-            end_pos = self.current_token_index
-            self.current_token_index = start_pos
-            
-            # Get the tokens being analyzed for debug
-            expr_tokens = self.token_stream[start_pos:end_pos]
-            expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
-            print(f"Expression tokens: {expr_str}")
+            if _DEBUG:
+                expr_tokens = self.token_stream[start_pos:end_pos]
+                expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
+                print(f"Expression tokens: {expr_str}")
             
             # Analyze the expression on the right side of the shortcut assignment
             expr_type = self.analyze_expression(end_pos)
-            print(f"Expression type: {expr_type}")
+            if _DEBUG:
+                print(f"Expression type: {expr_type}")
             
             # For shortcut assignments, the right operand must be a compatible numeric type
-            if expr_type not in ['nt', 'dbl']:
+            if expr_type not in _NUMERIC_TYPES and expr_type != ERR_TYPE:
                 raise SemanticError(
                     f"Type mismatch: Cannot use '{token_type}' with non-numeric type '{expr_type}'",
                     op_line, op_column
@@ -3159,19 +3327,21 @@ class SemanticAnalyzer:
             symbol.initialized = True
             
             # Move past the semicolon
-            if self.get_current_token()[0] == ';':
+            if self.current_token_index < n and tokens[self.current_token_index][0] == ';':
                 self.advance()  # Move past the semicolon
             return
         
         # Regular assignment (=)
-        elif token_type == '=':
+        elif op_kind == 'simple':
             # ... (rest of your existing regular assignment code)
             self.advance()  # Move past the = operator
 
             # Check if this is an npt input statement directly    
-            next_token = self.get_current_token()
-            if next_token and next_token[0] == 'npt':
-                print(f"Found direct npt function call in assignment for variable '{var_name}'")
+            i = self.current_token_index
+            next_token = tokens[i] if i < n else _NO_TOKEN
+            if next_token[0] == 'npt':
+                if _DEBUG:
+                    print(f"Found direct npt function call in assignment for variable '{var_name}'")
                 # Use our function call analyzer to process the npt function
                 expr_type = self.analyze_function_call()
                 
@@ -3180,7 +3350,7 @@ class SemanticAnalyzer:
                 symbol.initialized = True
                 
                 # Current position is now at the semicolon
-                if self.get_current_token()[0] == ';':
+                if self.current_token_index < n and tokens[self.current_token_index][0] == ';':
                     self.advance()  # Move past the semicolon
                 
                 return
@@ -3188,20 +3358,17 @@ class SemanticAnalyzer:
             # Save starting position for expression analysis
             start_pos = self.current_token_index
             
-            # Skip ahead to find the end of the expression (semicolon)
-            while (self.current_token_index < len(self.token_stream) and 
-                self.token_stream[self.current_token_index][0] != ';'):
-                self.advance()
-            
-            # Reset position to start of expression
-            end_pos = self.current_token_index
-            self.current_token_index = start_pos
+            # The end of the expression is the next semicolon, read from the
+            # precomputed ';' table so the cursor never has to walk there and back
+            end_pos = start_pos
+            if start_pos < len(self.token_stream):
+                end_pos = self._next_index_table(';')[start_pos]
             
             # Analyze the expression
             expr_type = self.analyze_expression(end_pos)
             
             # Validate assignment compatibility - no implicit conversions in Conso
-            if var_type != expr_type:
+            if not self.is_compatible_type(var_type, expr_type):
                 # Special case: Boolean variable can be assigned result of relational expression
                 if var_type == 'bln' and expr_type == 'bln':
                     # This is valid - a boolean variable can hold the result of a relational expression
@@ -3215,7 +3382,7 @@ class SemanticAnalyzer:
             symbol.initialized = True
             
             # Current position is now at the semicolon
-            if self.get_current_token()[0] == ';':
+            if self.current_token_index < n and tokens[self.current_token_index][0] == ';':
                 self.advance()  # Move past the semicolon
         else:
             raise SemanticError(f"Expected assignment operator, got '{token_type}'", op_line, op_column)
@@ -3234,62 +3401,47 @@ class SemanticAnalyzer:
         # Optionally: Check if variable is initialized before use
         if not symbol.initialized:
             # This could be a warning instead of an error
-            print(f"Warning: Variable '{var_name}' may be used before initialization at line {line}, column {column}")
+            if _DEBUG:
+                print(f"Warning: Variable '{var_name}' may be used before initialization at line {line}, column {column}")
             
         return symbol.data_type
     
-    def analyze_if_statement(self):
-        """Analyze an if statement (f statement in Conso)"""
-        token_type, token_value, line, column = self.get_current_token()
-        if token_type != 'f':
-            raise SemanticError(f"Expected 'f' keyword, got '{token_type}'", line, column)
-
-        self.advance()  # Move past 'f'
-
-        # Process opening parenthesis for condition
+    def _parse_paren_condition(self, keyword, paren_message, unclosed_message):
+        """Analyze the parenthesized condition of an f, lsf, whl or d-whl
+        statement starting at its '(' and move past the matching ')'. The
+        condition must be of type 'bln' or 'nt'."""
         token_type, token_value, line, column = self.get_current_token()
         if token_type != '(':
-            raise SemanticError(f"Expected '(' after 'f', got '{token_type}'", line, column)
-
-        # Keep track of the outermost parentheses level
-        outer_paren_start = self.current_token_index
-        self.advance()  # Move past opening parenthesis
-
-        # Need to find the matching closing parenthesis for the outermost level
-        paren_level = 1
-
-        while paren_level > 0 and self.current_token_index < len(self.token_stream):
-            current_token = self.get_current_token()[0]
-            if current_token == '(':
-                paren_level += 1
-            elif current_token == ')':
-                paren_level -= 1
-
-            if paren_level > 0:
-                self.advance()
-
-        # Now we should be at the closing parenthesis of the condition
-        if paren_level > 0:
-            raise SemanticError("Unclosed parenthesis in 'f' statement condition", line, column)
-
-        # Now at the closing parenthesis
-        outer_paren_end = self.current_token_index
+            raise SemanticError(f"{paren_message}, got '{token_type}'", line, column)
 
-        # Reset to just after the opening parenthesis
-        self.current_token_index = outer_paren_start + 1
+        # Look up the closing parenthesis of the condition in the bracket table
+        paren_start = self.current_token_index
+        paren_end = self._find_matching(paren_start, len(self.token_stream),
+                                        unclosed_message, line, column)
 
-        # Analyze the condition using your expression analyzer
         # The condition is everything between the parentheses
-        expr_type = self.analyze_expression(outer_paren_end)
+        self.current_token_index = paren_start + 1
+        expr_type = self.analyze_expression(paren_end)
 
         # --- MODIFIED CHECK: Allow 'nt' or 'bln' ---
-        if expr_type not in ['bln', 'nt']:
-            raise SemanticError(f"Condition in 'f' statement must be of type 'bln' or 'nt', got '{expr_type}'", line, column)
+        if expr_type not in _CONDITION_TYPES:
+            raise SemanticError(f"Condition in '{keyword}' statement must be of type 'bln' or 'nt', got '{expr_type}'", line, column)
         # --- END MODIFIED CHECK ---
 
-        # Move to the closing parenthesis and advance past it
-        self.current_token_index = outer_paren_end
-        self.advance()  # Move past the closing parenthesis
+        # Move past the closing parenthesis
+        self.current_token_index = paren_end + 1
+
+    def analyze_if_statement(self):
+        """Analyze an if statement (f statement in Conso)"""
+        token_type, token_value, line, column = self.get_current_token()
+        if token_type != 'f':
+            raise SemanticError(f"Expected 'f' keyword, got '{token_type}'", line, column)
+
+        self.advance()  # Move past 'f'
+
+        # Process the parenthesized condition and move past its ')'
+        self._parse_paren_condition('f', "Expected '(' after 'f'",
+                                    "Unclosed parenthesis in 'f' statement condition")
 
         # Process opening brace for if-body
         token_type, token_value, line, column = self.get_current_token()
@@ -3298,77 +3450,30 @@ class SemanticAnalyzer:
 
         self.advance()  # Move past '{'
 
-        # Create a new scope for the if-body
-        if_scope = SymbolTable(parent=self.current_scope, scope_name="if block")
+        # Process if-body statements in a new scope
         original_scope = self.current_scope  # Store the original scope
-        self.current_scope = if_scope
-
-        # Process if-body statements
-        self.analyze_block_statements()
-
-        # Restore original scope
-        self.current_scope = original_scope
-
-        # Check for elseif (lsf) or else (ls) statements
-        if self.current_token_index < len(self.token_stream):
-            token_type, token_value, line, column = self.get_current_token()
-            if token_type == 'lsf':
-                self.analyze_elseif_statement(original_scope)  # Pass the original scope
-            elif token_type == 'ls':
-                self.analyze_else_statement(original_scope)  # Pass the original scope
+        self._analyze_scoped_block(original_scope, "if block")
+
+        # Check for elseif (lsf) clauses, then an optional else (ls). The chain
+        # is walked here one clause at a time instead of by recursion
+        tokens = self.token_stream
+        n = len(tokens)
+        while self.current_token_index < n and tokens[self.current_token_index][0] == 'lsf':
+            self.analyze_elseif_statement(original_scope)  # Pass the original scope
+        if self.current_token_index < n and tokens[self.current_token_index][0] == 'ls':
+            self.analyze_else_statement(original_scope)  # Pass the original scope
     
     def analyze_elseif_statement(self, parent_scope):
-        """Analyze an else-if statement (lsf statement in Conso)"""
+        """Analyze one else-if clause (lsf statement in Conso)"""
         token_type, token_value, line, column = self.get_current_token()
         if token_type != 'lsf':
             raise SemanticError(f"Expected 'lsf' keyword, got '{token_type}'", line, column)
 
         self.advance()  # Move past 'lsf'
 
-        # Process opening parenthesis for condition
-        token_type, token_value, line, column = self.get_current_token()
-        if token_type != '(':
-            raise SemanticError(f"Expected '(' after 'lsf', got '{token_type}'", line, column)
-
-        # Keep track of the outermost parentheses level
-        outer_paren_start = self.current_token_index
-        self.advance()  # Move past opening parenthesis
-
-        # Need to find the matching closing parenthesis for the outermost level
-        paren_level = 1
-
-        while paren_level > 0 and self.current_token_index < len(self.token_stream):
-            current_token = self.get_current_token()[0]
-            if current_token == '(':
-                paren_level += 1
-            elif current_token == ')':
-                paren_level -= 1
-
-            if paren_level > 0:
-                self.advance()
-
-        # Now we should be at the closing parenthesis of the condition
-        if paren_level > 0:
-            raise SemanticError("Unclosed parenthesis in 'lsf' statement condition", line, column)
-
-        # Now at the closing parenthesis
-        outer_paren_end = self.current_token_index
-
-        # Reset to just after the opening parenthesis
-        self.current_token_index = outer_paren_start + 1
-
-        # Analyze the condition using your expression analyzer
-        # The condition is everything between the parentheses
-        expr_type = self.analyze_expression(outer_paren_end)
-
-        # --- MODIFIED CHECK: Allow 'nt' or 'bln' ---
-        if expr_type not in ['bln', 'nt']:
-            raise SemanticError(f"Condition in 'lsf' statement must be of type 'bln' or 'nt', got '{expr_type}'", line, column)
-        # --- END MODIFIED CHECK ---
-
-        # Move to the closing parenthesis and advance past it
-        self.current_token_index = outer_paren_end
-        self.advance()  # Move past the closing parenthesis
+        # Process the parenthesized condition and move past its ')'
+        self._parse_paren_condition('lsf', "Expected '(' after 'lsf'",
+                                    "Unclosed parenthesis in 'lsf' statement condition")
 
         # Process opening brace for elseif-body
         token_type, token_value, line, column = self.get_current_token()
@@ -3377,23 +3482,10 @@ class SemanticAnalyzer:
 
         self.advance()  # Move past '{'
 
-        # Create a new scope for the elseif-body, using the passed parent scope
-        elseif_scope = SymbolTable(parent=parent_scope, scope_name="elseif block")
-        self.current_scope = elseif_scope
-
-        # Process elseif-body statements
-        self.analyze_block_statements()
-
-        # Restore original scope
-        self.current_scope = parent_scope
-
-        # Check for another elseif (lsf) or else (ls) statement
-        if self.current_token_index < len(self.token_stream):
-            token_type, token_value, line, column = self.get_current_token()
-            if token_type == 'lsf':
-                self.analyze_elseif_statement(parent_scope)  # Pass the original scope
-            elif token_type == 'ls':
-                self.analyze_else_statement(parent_scope)  # Pass the original scope
+        # Process elseif-body statements in a new scope under the passed parent
+        # scope. Any following lsf/ls clause is handled by the loop in
+        # analyze_if_statement
+        self._analyze_scoped_block(parent_scope, "elseif block")
 
     def analyze_else_statement(self, parent_scope):
         """Analyze an else statement (ls statement in Conso)"""
@@ -3410,15 +3502,8 @@ class SemanticAnalyzer:
         
         self.advance()  # Move past '{'
         
-        # Create a new scope for the else-body, using the passed parent scope
-        else_scope = SymbolTable(parent=parent_scope, scope_name="else block")
-        self.current_scope = else_scope
-        
-        # Process else-body statements
-        self.analyze_block_statements()
-        
-        # Restore original scope
-        self.current_scope = parent_scope
+        # Process else-body statements in a new scope under the passed parent scope
+        self._analyze_scoped_block(parent_scope, "else block")
 
     def analyze_switch_statement(self):
         """Analyze a switch statement (swtch statement in Conso)"""
@@ -3494,8 +3579,10 @@ class SemanticAnalyzer:
         has_default = False
         found_break = True  # Initially true to allow the first case
         
-        while self.current_token_index < len(self.token_stream):
-            token_type, token_value, line, column = self.get_current_token()
+        tokens = self.token_stream
+        n = len(tokens)
+        while self.current_token_index < n:
+            token_type, token_value, line, column = tokens[self.current_token_index]
             
             # Check for end of switch
             if token_type == '}':
@@ -3542,88 +3629,8 @@ class SemanticAnalyzer:
                 
                 self.advance()  # Move past ':'
                 
-                # Reset break flag
-                found_break = False
-                
                 # Process statements until break or next case/default
-                while self.current_token_index < len(self.token_stream):
-                    current_token = self.get_current_token()[0]
-                    
-                    # Check for continue statement
-                    if current_token == 'cntn':
-                        raise SemanticError("Continue statement cannot be used directly in a switch case", 
-                                        self.get_current_token()[2], self.get_current_token()[3])
-                    
-                    # Found break - set flag and process it
-                    if current_token == 'brk':
-                        found_break = True
-                        self.analyze_break_statement()
-                        break
-                    
-                    # Reached another case or end of switch without finding break
-                    if current_token in ['cs', 'dflt', '}']:
-                        raise SemanticError(f"Missing 'brk' statement at end of case", line, column)
-                    
-                    # Now we'll properly handle statements in the case block
-                    # Handle various statement types (including loops and nested switches)
-                    if current_token == 'f':
-                        self.analyze_if_statement()
-                    elif current_token == 'whl':
-                        # Allow loops inside switch cases
-                        self.analyze_while_loop()
-                    elif current_token == 'fr':
-                        # Allow for loops inside switch cases
-                        self.analyze_for_loop()
-                    elif current_token == 'd':
-                        # Allow do-while loops inside switch cases
-                        self.analyze_do_while_loop()
-                    elif current_token == 'swtch':
-                        # Allow nested switch statements - REMOVED the restriction
-                        self.analyze_switch_statement()
-                    elif current_token == 'cnst':
-                        self.analyze_constant_declaration()
-                    elif current_token == 'dfstrct':
-                        self.analyze_struct_instantiation()
-                    elif current_token in self.data_types:
-                        start_pos = self.current_token_index
-                        self.advance()
-                        if self.current_token_index >= len(self.token_stream) or self.token_stream[self.current_token_index][0] != 'id':
-                            raise SemanticError(f"Expected an identifier after '{current_token}'", 
-                                            self.get_current_token()[2], self.get_current_token()[3])
-                        
-                        next_token = self.peek_next_token()
-                        if next_token and next_token[0] == '[':
-                            self.current_token_index = start_pos
-                            self.analyze_array_declaration()
-                        else:
-                            self.current_token_index = start_pos
-                            self.analyze_variable_declaration()
-                    elif current_token == 'id':
-                        id_token_value = self.get_current_token()[1]
-                        next_token = self.peek_next_token()
-                        if next_token and next_token[0] == '.':
-                            self.analyze_struct_member_access()
-                        elif next_token and next_token[0] == '(':
-                            self.analyze_function_call()
-                        elif next_token and next_token[0] == '[':
-                            self.analyze_array_access()
-                            
-                            # Skip to end of statement
-                            while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != ';':
-                                self.advance()
-                            self.advance()  # Move past semicolon
-                        elif next_token and next_token[0] == '=':
-                            self.analyze_assignment()
-                        else:
-                            self.check_variable_usage(id_token_value, 
-                                                self.get_current_token()[2], self.get_current_token()[3])
-                            self.advance()
-                    elif current_token == 'prnt':
-                        self.analyze_print_statement()
-                    elif current_token == 'rtrn':
-                        self.analyze_return_in_conditional()
-                    else:
-                        self.advance()
+                found_break = self._analyze_case_statements(False, line, column)
             
             # Handle default case
             elif token_type == 'dflt':
@@ -3644,85 +3651,8 @@ class SemanticAnalyzer:
                 
                 self.advance()  # Move past ':'
                 
-                # Reset break flag
-                found_break = False
-                
-                # Process statements until break or next case/default (similar logic to case)
-                while self.current_token_index < len(self.token_stream):
-                    current_token = self.get_current_token()[0]
-                    
-                    # Check for continue statement
-                    if current_token == 'cntn':
-                        raise SemanticError("Continue statement cannot be used directly in a switch default block", 
-                                        self.get_current_token()[2], self.get_current_token()[3])
-                    
-                    # Found break
-                    if current_token == 'brk':
-                        found_break = True
-                        self.analyze_break_statement()
-                        break
-                    
-                    # Reached another case or end of switch without finding break
-                    if current_token in ['cs', 'dflt', '}']:
-                        raise SemanticError(f"Missing 'brk' statement at end of default case", line, column)
-                    
-                    # Now handle all possible statements in the default block
-                    # Process statements (same as case block)
-                    if current_token == 'f':
-                        self.analyze_if_statement()
-                    elif current_token == 'whl':
-                        self.analyze_while_loop()
-                    elif current_token == 'fr':
-                        self.analyze_for_loop()
-                    elif current_token == 'd':
-                        self.analyze_do_while_loop()
-                    elif current_token == 'swtch':
-                        # Allow nested switch
-                        self.analyze_switch_statement()
-                    elif current_token == 'cnst':
-                        self.analyze_constant_declaration()
-                    elif current_token == 'dfstrct':
-                        self.analyze_struct_instantiation()
-                    elif current_token in self.data_types:
-                        start_pos = self.current_token_index
-                        self.advance()
-                        if self.current_token_index >= len(self.token_stream) or self.token_stream[self.current_token_index][0] != 'id':
-                            raise SemanticError(f"Expected an identifier after '{current_token}'", 
-                                            self.get_current_token()[2], self.get_current_token()[3])
-                        
-                        next_token = self.peek_next_token()
-                        if next_token and next_token[0] == '[':
-                            self.current_token_index = start_pos
-                            self.analyze_array_declaration()
-                        else:
-                            self.current_token_index = start_pos
-                            self.analyze_variable_declaration()
-                    elif current_token == 'id':
-                        id_token_value = self.get_current_token()[1]
-                        next_token = self.peek_next_token()
-                        if next_token and next_token[0] == '.':
-                            self.analyze_struct_member_access()
-                        elif next_token and next_token[0] == '(':
-                            self.analyze_function_call()
-                        elif next_token and next_token[0] == '[':
-                            self.analyze_array_access()
-                            
-                            # Skip to end of statement
-                            while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != ';':
-                                self.advance()
-                            self.advance()  # Move past semicolon
-                        elif next_token and next_token[0] == '=':
-                            self.analyze_assignment()
-                        else:
-                            self.check_variable_usage(id_token_value, 
-                                                self.get_current_token()[2], self.get_current_token()[3])
-                            self.advance()
-                    elif current_token == 'prnt':
-                        self.analyze_print_statement()
-                    elif current_token == 'rtrn':
-                        self.analyze_return_in_conditional()
-                    else:
-                        self.advance()
+                # Process statements until break or next case/default
+                found_break = self._analyze_case_statements(True, line, column)
             
             elif token_type == 'brk' and not self.in_case_block:
                 raise SemanticError("Break statement in switch must appear within a case or default block", 
@@ -3736,13 +3666,83 @@ class SemanticAnalyzer:
         self.in_case_block = old_in_case_block
         self.current_scope = original_scope
 
+    def _analyze_case_statements(self, is_default, line, column):
+        """Analyze the statements of one case (or the default) body, checking
+        for its 'brk' in the same walk. Returns True once the 'brk' has been
+        analyzed, or False if the stream ends first. Reaching another label or
+        the end of the switch raises, reported at the ':' at (line, column)."""
+        tokens = self.token_stream
+        n = len(tokens)
+        dispatch = self._dispatch_case_statement
+        while self.current_token_index < n:
+            tok = tokens[self.current_token_index]
+            current_token = tok[0]
+            
+            # Check for continue statement
+            if current_token == 'cntn':
+                where = "switch default block" if is_default else "switch case"
+                raise SemanticError(f"Continue statement cannot be used directly in a {where}", 
+                                tok[2], tok[3])
+            
+            # Found break - process it
+            if current_token == 'brk':
+                self.analyze_break_statement()
+                return True
+            
+            # Reached another case or end of switch without finding break
+            if current_token in _CASE_BODY_ENDERS:
+                where = "default case" if is_default else "case"
+                raise SemanticError(f"Missing 'brk' statement at end of {where}", line, column)
+            
+            # Loops, nested switches, declarations and other statements
+            dispatch(tok)
+        return False
+
+    def _dispatch_case_statement(self, tok):
+        """Analyze the statement starting at `tok` (the current token) inside a
+        case or default body. Keywords go through _statement_handlers;
+        declarations and identifier statements are handled here, and any other
+        token is skipped."""
+        current_token = tok[0]
+        handler = self._statement_handlers.get(current_token)
+        if handler is not None:
+            handler()
+        elif current_token in self.data_types:
+            tokens = self.token_stream
+            start_pos = self.current_token_index
+            self.advance()
+            if self.current_token_index >= len(tokens) or tokens[self.current_token_index][0] != 'id':
+                raise SemanticError(f"Expected an identifier after '{current_token}'", 
+                                self.get_current_token()[2], self.get_current_token()[3])
+            
+            next_token = self.peek_next_token()
+            self.current_token_index = start_pos
+            if next_token and next_token[0] == '[':
+                self.analyze_array_declaration()
+            else:
+                self.analyze_variable_declaration()
+        elif current_token == 'id':
+            tokens = self.token_stream
+            next_pos = self.current_token_index + 1
+            next_type = tokens[next_pos][0] if next_pos < len(tokens) else None
+            handler = self._id_statement_handlers.get(next_type)
+            if handler is not None:
+                handler()
+            else:
+                self.check_variable_usage(tok[1], tok[2], tok[3])
+                self.advance()
+        else:
+            self.advance()
+
     def analyze_case_body(self):
         """Analyze statements inside a case body until break statement"""
         # Keep track of whether we found a nested switch or break
         found_break = False
         
-        while self.current_token_index < len(self.token_stream):
-            token_type, token_value, line, column = self.get_current_token()
+        tokens = self.token_stream
+        n = len(tokens)
+        while self.current_token_index < n:
+            token_type, token_value, line, column = tokens[self.current_token_index]
             
             # Check for break statement
             if token_type == 'brk':
@@ -3757,7 +3757,7 @@ class SemanticAnalyzer:
                 return False  # Return False to indicate no break was found
             
             # Handle other case statements (missing break)
-            if token_type in ['cs', 'dflt']:
+            if token_type in _CASE_LABELS:
                 return False  # Return False to indicate no break was found
             
             # Handle if statements
@@ -3773,7 +3773,7 @@ class SemanticAnalyzer:
             elif token_type in self.data_types:
                 start_pos = self.current_token_index
                 self.advance()
-                if self.current_token_index >= len(self.token_stream) or self.token_stream[self.current_token_index][0] != 'id':
+                if self.current_token_index >= n or tokens[self.current_token_index][0] != 'id':
                     raise SemanticError(f"Expected an identifier after '{token_type}'", line, column)
                 
                 next_token = self.peek_next_token()
@@ -3784,7 +3784,8 @@ class SemanticAnalyzer:
                     self.current_token_index = start_pos
                     self.analyze_variable_declaration()
             elif token_type == 'id':
-                next_token = self.peek_next_token()
+                next_pos = self.current_token_index + 1
+                next_token = tokens[next_pos] if next_pos < n else _NO_TOKEN
                 if next_token and next_token[0] == '.':
                     self.analyze_struct_member_access()
                 elif next_token and next_token[0] == '(':
@@ -3793,9 +3794,7 @@ class SemanticAnalyzer:
                     self.analyze_array_access()
                     
                     # Skip to end of statement
-                    while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != ';':
-                        self.advance()
-                    self.advance()  # Move past semicolon
+                    self._skip_past_semicolon()
                 elif next_token and next_token[0] == '=':
                     self.analyze_assignment()
                 else:
@@ -3809,7 +3808,7 @@ class SemanticAnalyzer:
     def analyze_if_statement_in_switch(self):
         """Analyze an if statement inside a switch case (special handling to prevent nested switch)"""
         # Create a flag to track that we're inside a switch case
-        old_in_switch = getattr(self, 'in_switch_case', False)
+        old_in_switch = self.in_switch_case
         self.in_switch_case = True
         
         try:
@@ -3819,18 +3818,36 @@ class SemanticAnalyzer:
             # Restore the flag
             self.in_switch_case = old_in_switch
 
+    def _analyze_scoped_block(self, parent_scope, scope_name):
+        """Analyze the statements of a block (cursor just past its '{') in a new
+        scope under parent_scope, then make parent_scope current again. The
+        entry point every if/lsf/ls and loop body goes through."""
+        self.current_scope = SymbolTable(parent=parent_scope, scope_name=scope_name)
+        self.analyze_block_statements()
+        self.current_scope = parent_scope
+
     def analyze_block_statements(self):
         """Analyze statements inside a block until closing brace"""
+        tokens = self.token_stream
+        n = len(tokens)
+        statement_handlers = self._statement_handlers
+        id_statement_handlers = self._block_id_statement_handlers
+        data_types = self.data_types
+        advance = self.advance
         # Process block statements until we find closing brace
-        while self.current_token_index < len(self.token_stream):
-            token_type, token_value, line, column = self.get_current_token()
+        while self.current_token_index < n:
+            # Only the type is needed to dispatch; value and position are
+            # unpacked in the branches that use them
+            tok = tokens[self.current_token_index]
+            token_type = tok[0]
             
             # Add debug output
-            print(f"Processing token in block: {token_type} '{token_value}' at line {line}, column {column}")
+            if _DEBUG:
+                print(f"Processing token in block: {token_type} '{tok[1]}' at line {tok[2]}, column {tok[3]}")
             
             # Check for end of block
             if token_type == '}':
-                self.advance()  # Move past '}'
+                advance()  # Move past '}'
                 break
 
             # Add special handling for break and continue
@@ -3846,53 +3863,38 @@ class SemanticAnalyzer:
                 elif self.in_switch:
                     # Break in a switch but not in a case block
                     raise SemanticError("Break statement in switch must appear within a case or default block", 
-                                    line, column)
+                                    tok[2], tok[3])
                 else:
                     # Not in a loop or switch
                     raise SemanticError("Break statement can only be used inside a loop or switch statement", 
-                                    line, column)
+                                    tok[2], tok[3])
                 
             if token_type == 'cntn':
                 if self.in_switch and not self.in_loop:
                     # Continue inside switch but not inside a loop
                     raise SemanticError("Continue statement cannot be used in a switch statement", 
-                                    line, column)
+                                    tok[2], tok[3])
                 elif not self.in_loop:
                     # Not in a loop
                     raise SemanticError("Continue statement can only be used inside a loop", 
-                                    line, column)
+                                    tok[2], tok[3])
                 else:
                     # Inside a loop, continue is fine
                     self.analyze_continue_statement()
                     continue
             
-            # Handle all statement types
-            if token_type == 'f':
-                self.analyze_if_statement()
-            elif token_type == 'whl':
-                self.analyze_while_loop()
-            elif token_type == 'd':
-                self.analyze_do_while_loop()
-            elif token_type == 'fr':
-                self.analyze_for_loop()
-            elif token_type == 'swtch':
-                self.analyze_switch_statement()
-            elif token_type == 'prnt':
-                # Explicitly call analyze_print_statement when 'prnt' token is found
-                print("Found print statement - calling analyze_print_statement()")  # Debug
-                self.analyze_print_statement()
-            elif token_type == 'rtrn':
-                # Handle return inside blocks
-                self.analyze_return_in_conditional()
-            elif token_type == 'cnst':
-                self.analyze_constant_declaration()
-            elif token_type == 'dfstrct':
-                self.analyze_struct_instantiation()
-            elif token_type in self.data_types:
+            # Handle all statement types: keyword statements (f, whl, d, fr,
+            # swtch, prnt, rtrn, cnst, dfstrct) through the handler table
+            handler = statement_handlers.get(token_type)
+            if handler is not None:
+                if _DEBUG and token_type == 'prnt':
+                    print("Found print statement - calling analyze_print_statement()")
+                handler()
+            elif token_type in data_types:
                 start_pos = self.current_token_index
-                self.advance()
-                if self.current_token_index >= len(self.token_stream) or self.token_stream[self.current_token_index][0] != 'id':
-                    raise SemanticError(f"Expected an identifier after '{token_type}'", line, column)
+                advance()
+                if self.current_token_index >= n or tokens[self.current_token_index][0] != 'id':
+                    raise SemanticError(f"Expected an identifier after '{token_type}'", tok[2], tok[3])
                 
                 next_token = self.peek_next_token()
                 if next_token and next_token[0] == '[':
@@ -3902,33 +3904,25 @@ class SemanticAnalyzer:
                     self.current_token_index = start_pos
                     self.analyze_variable_declaration()
             elif token_type == 'id':
-                next_token = self.peek_next_token()
-                
-                # Check for increment/decrement operations
-                if next_token and next_token[0] in ['++', '--']:
-                    self.analyze_increment_operation()
-                # Check for shortcut assignments
-                elif next_token and next_token[0] in ['+=', '-=', '*=', '/=', '%=']:
-                    print(f"Found shortcut assignment {token_value} {next_token[0]}")
-                    self.analyze_assignment()
-                elif next_token and next_token[0] == '.':
-                    self.analyze_struct_member_access()
-                elif next_token and next_token[0] == '(':
-                    self.analyze_function_call()
-                elif next_token and next_token[0] == '[':
-                    self.analyze_array_access()
-                    
-                    # Skip to end of statement
-                    while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != ';':
-                        self.advance()
-                    self.advance()  # Move past semicolon
-                elif next_token and next_token[0] == '=':
-                    self.analyze_assignment()
+                # Increments, assignments (plain and shortcut), member
+                # accesses, calls and array accesses, by the next token's type
+                next_pos = self.current_token_index + 1
+                handler = id_statement_handlers.get(tokens[next_pos][0] if next_pos < n else None)
+                if handler is not None:
+                    if _DEBUG and tokens[next_pos][0] in _COMPOUND_ASSIGN_OPERATORS:
+                        print(f"Found shortcut assignment {tok[1]} {tokens[next_pos][0]}")
+                    handler()
                 else:
-                    self.check_variable_usage(token_value, line, column)
-                    self.advance()
+                    self.check_variable_usage(tok[1], tok[2], tok[3])
+                    advance()
             else:
-                self.advance()  # Skip other tokens
+                advance()  # Skip other tokens
+
+    def _analyze_array_access_statement(self):
+        """Analyze a statement that starts with an array access, then skip to
+        the end of the statement."""
+        self.analyze_array_access()
+        self._skip_past_semicolon()
 
     def analyze_return_in_conditional(self):
         """Analyze a return statement inside a conditional block"""
@@ -3939,16 +3933,8 @@ class SemanticAnalyzer:
         self.advance()  # Move past 'rtrn'
 
         # Check if we're in the main function
-        is_main_function = False
-        current_function_name = None
-        temp_scope = self.current_scope
-        while temp_scope:
-            if temp_scope.scope_name.startswith("function "):
-                current_function_name = temp_scope.scope_name[len("function "):]
-                if current_function_name == "mn":
-                    is_main_function = True
-                break
-            temp_scope = temp_scope.parent
+        current_function_name = self._function_stack[-1] if self._function_stack else None
+        is_main_function = current_function_name == "mn"
 
         # --- REMOVED CHECK THAT DISALLOWED RETURN IN MAIN ---
         # # No return statements allowed in main function
@@ -3991,24 +3977,16 @@ class SemanticAnalyzer:
                     # --- END ADDED check for main ---
                     # For non-void, non-main functions, analyze the return expression
                     else:
-                        start_pos = self.current_token_index
-
-                        # Find the end of the return expression (semicolon)
-                        while self.current_token_index < len(self.token_stream) and self.token_stream[self.current_token_index][0] != ';':
-                            self.advance()
-
-                        if self.current_token_index >= len(self.token_stream) or self.get_current_token()[0] != ';':
+                        # The return expression ends at the next semicolon
+                        end_pos = self._next_stop_index(self.current_token_index)
+                        if end_pos >= len(self.token_stream):
                              raise SemanticError("Expected ';' after return value", line, column)
 
-
-                        end_pos = self.current_token_index
-                        self.current_token_index = start_pos
-
                         # Analyze the expression
                         expr_type = self.analyze_expression(end_pos)
 
                         # Check if return type matches function return type
-                        if expr_type != return_type:
+                        if not self.is_compatible_type(return_type, expr_type):
                             raise SemanticError(f"Return type mismatch: expected '{return_type}', got '{expr_type}'", line, column)
 
                         # Move past the semicolon
@@ -4031,16 +4009,21 @@ class SemanticAnalyzer:
         if token_type != '(':
             raise SemanticError(f"Expected '(' after 'fr', got '{token_type}'", line, column)
         
+        header_paren_start = self.current_token_index
         self.advance()  # Move past '('
         
+        # The header declares nothing and stays in one scope, so its names can
+        # share one lookup memo (the condition's analyze_expression refills it)
+        self._lookup_cache = {}
+        lookup = self._cached_lookup
+        
         # Process initialization part
         # Note: You mentioned initialization is already validated in syntax
         # We'll just skip past it to the first semicolon
         init_start = self.current_token_index
-        while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != ';':
-            self.advance()
+        self._skip_to_semicolon()
         
-        if self.current_token_index >= len(self.token_stream) or self.get_current_token()[0] != ';':
+        if self.get_current_token()[0] != ';':
             raise SemanticError(f"Expected ';' after for loop initialization", line, column)
         
         # Go back to analyze the initialization
@@ -4048,12 +4031,11 @@ class SemanticAnalyzer:
         
         # Process the initialization (typically an assignment)
         # In your language, this should only be an 'nt' variable initialized with an 'nt' value
-        if self.get_current_token()[0] == 'id':
-            var_name = self.get_current_token()[1]
-            init_line, init_column = self.get_current_token()[2], self.get_current_token()[3]
+        cur_type, var_name, init_line, init_column = self.get_current_token()
+        if cur_type == 'id':
             
             # Check if variable exists
-            var_symbol = self.current_scope.lookup(var_name)
+            var_symbol = lookup(var_name)
             if not var_symbol:
                 raise SemanticError(f"Undefined variable '{var_name}' in for loop initialization", init_line, init_column)
             
@@ -4065,20 +4047,20 @@ class SemanticAnalyzer:
             self.advance()  # Move past variable name
             
             # Expect = sign
-            if self.get_current_token()[0] != '=':
-                raise SemanticError(f"Expected '=' in for loop initialization, got '{self.get_current_token()[0]}'", init_line, init_column)
+            cur_type = self.get_current_token()[0]
+            if cur_type != '=':
+                raise SemanticError(f"Expected '=' in for loop initialization, got '{cur_type}'", init_line, init_column)
             
             self.advance()  # Move past =
             
             # Check the value being assigned
-            init_value_type = self.get_current_token()[0]
+            init_value_type, init_id = self.get_current_token()[:2]
             if init_value_type == 'ntlit':
                 # Integer literal is OK
                 self.advance()  # Move past literal
             elif init_value_type == 'id':
                 # Check if the identifier is of type 'nt'
-                init_id = self.get_current_token()[1]
-                init_id_symbol = self.current_scope.lookup(init_id)
+                init_id_symbol = lookup(init_id)
                 if not init_id_symbol:
                     raise SemanticError(f"Undefined variable '{init_id}' in for loop initialization", init_line, init_column)
                 
@@ -4090,118 +4072,102 @@ class SemanticAnalyzer:
                 raise SemanticError(f"For loop initialization value must be an 'nt' literal or identifier, got '{init_value_type}'", init_line, init_column)
         
         # Now we should be at the first semicolon
-        if self.get_current_token()[0] != ';':
-            raise SemanticError(f"Expected ';' after for loop initialization, got '{self.get_current_token()[0]}'", 
-                            self.get_current_token()[2], self.get_current_token()[3])
+        cur_type, _, cur_line, cur_column = self.get_current_token()
+        if cur_type != ';':
+            raise SemanticError(f"Expected ';' after for loop initialization, got '{cur_type}'", 
+                            cur_line, cur_column)
         
         self.advance()  # Move past the first semicolon
         
         # Process the condition
         condition_start = self.current_token_index
-        condition_line, condition_column = self.get_current_token()[2], self.get_current_token()[3]
+        condition_line, condition_column = self.get_current_token()[2:]
         
-        # Find the end of the condition (should be the second semicolon)
-        while self.current_token_index < len(self.token_stream) and self.get_current_token()[0] != ';':
-            self.advance()
-        
-        if self.current_token_index >= len(self.token_stream) or self.get_current_token()[0] != ';':
+        # The condition ends at the second semicolon
+        condition_end = self._next_stop_index(condition_start)
+        if condition_end >= len(self.token_stream):
             raise SemanticError(f"Expected ';' after for loop condition", condition_line, condition_column)
         
-        condition_end = self.current_token_index
-        self.current_token_index = condition_start
-        
         # Analyze the condition expression - it must evaluate to a boolean
         # and must only involve 'nt' values in the comparison
         condition_expr_type = self.analyze_expression(condition_end)
-        if condition_expr_type != 'bln':
+        if condition_expr_type != 'bln' and condition_expr_type != ERR_TYPE:
             raise SemanticError(f"For loop condition must evaluate to a boolean, got '{condition_expr_type}'", 
                             condition_line, condition_column)
         
         # Now we should be at the second semicolon
-        if self.get_current_token()[0] != ';':
-            raise SemanticError(f"Expected ';' after for loop condition, got '{self.get_current_token()[0]}'", 
-                            self.get_current_token()[2], self.get_current_token()[3])
+        cur_type, _, cur_line, cur_column = self.get_current_token()
+        if cur_type != ';':
+            raise SemanticError(f"Expected ';' after for loop condition, got '{cur_type}'", 
+                            cur_line, cur_column)
         
         self.advance()  # Move past the second semicolon
         
         # Process the increment/decrement
         increment_start = self.current_token_index
-        increment_line, increment_column = self.get_current_token()[2], self.get_current_token()[3]
+        incr_op, _, increment_line, increment_column = self.get_current_token()
         
-        # Find the end of the increment (should be the closing parenthesis)
-        paren_level = 1  # Start at 1 because we're already inside a parenthesis
-        while self.current_token_index < len(self.token_stream):
-            if self.get_current_token()[0] == '(':
-                paren_level += 1
-            elif self.get_current_token()[0] == ')':
-                paren_level -= 1
-                if paren_level == 0:
-                    break
-            
-            self.advance()
-        
-        if self.current_token_index >= len(self.token_stream) or self.get_current_token()[0] != ')':
+        # The increment ends at the parenthesis closing the loop header, taken
+        # from the bracket table
+        increment_end = self._matching[header_paren_start]
+        if increment_end is None or increment_end < increment_start:
             raise SemanticError(f"Expected ')' after for loop increment", increment_line, increment_column)
         
-        increment_end = self.current_token_index
-        self.current_token_index = increment_start
-        
         # Analyze the increment expression - it must involve an 'nt' identifier
         # Check for pre-increment/decrement: ++id or --id
-        if self.get_current_token()[0] in ['++', '--']:
-            incr_op = self.get_current_token()[0]
+        if incr_op in _INCDEC_OPERATORS:
             self.advance()  # Move past operator
             
-            if self.get_current_token()[0] != 'id':
+            cur_type, incr_var_name, cur_line, cur_column = self.get_current_token()
+            if cur_type != 'id':
                 raise SemanticError(f"Expected an identifier after '{incr_op}' in for loop increment", 
-                                self.get_current_token()[2], self.get_current_token()[3])
+                                cur_line, cur_column)
             
-            incr_var_name = self.get_current_token()[1]
-            incr_var_symbol = self.current_scope.lookup(incr_var_name)
+            incr_var_symbol = lookup(incr_var_name)
             
             if not incr_var_symbol:
                 raise SemanticError(f"Undefined variable '{incr_var_name}' in for loop increment", 
-                                self.get_current_token()[2], self.get_current_token()[3])
+                                cur_line, cur_column)
             
             # Check if variable is of type 'nt'
             if incr_var_symbol.data_type != 'nt':
                 raise SemanticError(f"Variable in for loop increment must be of type 'nt', got '{incr_var_symbol.data_type}'", 
-                                self.get_current_token()[2], self.get_current_token()[3])
+                                cur_line, cur_column)
             
             self.advance()  # Move past identifier
         
         # Check for post-increment/decrement or other forms: id++ or id-- or other assignments
-        elif self.get_current_token()[0] == 'id':
+        elif incr_op == 'id':
             incr_var_name = self.get_current_token()[1]
-            incr_var_symbol = self.current_scope.lookup(incr_var_name)
+            incr_var_symbol = lookup(incr_var_name)
             
             if not incr_var_symbol:
                 raise SemanticError(f"Undefined variable '{incr_var_name}' in for loop increment", 
-                                self.get_current_token()[2], self.get_current_token()[3])
+                                increment_line, increment_column)
             
             # Check if variable is of type 'nt'
             if incr_var_symbol.data_type != 'nt':
                 raise SemanticError(f"Variable in for loop increment must be of type 'nt', got '{incr_var_symbol.data_type}'", 
-                                self.get_current_token()[2], self.get_current_token()[3])
+                                increment_line, increment_column)
             
             self.advance()  # Move past identifier
             
             # Check for operator: ++, --, +=, -=, *=, /=
-            if self.get_current_token()[0] in ['++', '--']:
+            operator = self.get_current_token()[0]
+            if operator in _INCDEC_OPERATORS:
                 # Simple increment/decrement is fine
                 self.advance()  # Move past operator
-            elif self.get_current_token()[0] in ['+=', '-=', '*=', '/=']:
-                operator = self.get_current_token()[0]
+            elif operator in _FOR_UPDATE_ASSIGN_OPERATORS:
                 self.advance()  # Move past operator
                 
                 # Check the value - should be 'nt' literal or identifier
-                if self.get_current_token()[0] == 'ntlit':
+                value_type, right_id = self.get_current_token()[:2]
+                if value_type == 'ntlit':
                     # Integer literal is OK
                     self.advance()  # Move past literal
-                elif self.get_current_token()[0] == 'id':
+                elif value_type == 'id':
                     # Check if the identifier is of type 'nt'
-                    right_id = self.get_current_token()[1]
-                    right_id_symbol = self.current_scope.lookup(right_id)
+                    right_id_symbol = lookup(right_id)
                     
                     if not right_id_symbol:
                         raise SemanticError(f"Undefined variable '{right_id}' in for loop increment", 
@@ -4213,20 +4179,21 @@ class SemanticAnalyzer:
                     
                     self.advance()  # Move past identifier
                 else:
-                    raise SemanticError(f"For loop increment value must be an 'nt' literal or identifier, got '{self.get_current_token()[0]}'", 
+                    raise SemanticError(f"For loop increment value must be an 'nt' literal or identifier, got '{value_type}'", 
                                     increment_line, increment_column)
             else:
-                raise SemanticError(f"Expected increment/decrement operator in for loop increment, got '{self.get_current_token()[0]}'", 
+                raise SemanticError(f"Expected increment/decrement operator in for loop increment, got '{operator}'", 
                                 increment_line, increment_column)
         
         # Skip to the end of the increment (should be the closing parenthesis)
-        while self.current_token_index < increment_end:
-            self.advance()
+        if self.current_token_index < increment_end:
+            self.current_token_index = increment_end
         
         # Now we should be at the closing parenthesis
-        if self.get_current_token()[0] != ')':
-            raise SemanticError(f"Expected ')' after for loop increment, got '{self.get_current_token()[0]}'", 
-                            self.get_current_token()[2], self.get_current_token()[3])
+        cur_type, _, cur_line, cur_column = self.get_current_token()
+        if cur_type != ')':
+            raise SemanticError(f"Expected ')' after for loop increment, got '{cur_type}'", 
+                            cur_line, cur_column)
         
         self.advance()  # Move past the closing parenthesis
         
@@ -4241,28 +4208,15 @@ class SemanticAnalyzer:
         old_in_loop = self.in_loop
         self.in_loop = True
         
-        # Create a new scope for the loop body
-        loop_scope = SymbolTable(parent=self.current_scope, scope_name="for loop block")
-        original_scope = self.current_scope
-        self.current_scope = loop_scope
+        # Process loop body statements in a new scope
+        self._analyze_scoped_block(self.current_scope, "for loop block")
         
-        # Process loop body statements
-        self.analyze_block_statements()
-        
-        # Restore original flags and scope
+        # Restore original flags
         self.in_loop = old_in_loop
-        self.current_scope = original_scope
-        
-        # Create a new scope for the loop body
-        loop_scope = SymbolTable(parent=self.current_scope, scope_name="for loop block")
-        original_scope = self.current_scope
-        self.current_scope = loop_scope
-        
-        # Process loop body statements
-        self.analyze_block_statements()
         
-        # Restore original scope
-        self.current_scope = original_scope
+        # Process statements again in another new loop scope (runs on from
+        # the token after the body)
+        self._analyze_scoped_block(self.current_scope, "for loop block")
 
     def analyze_while_loop(self):
         """Analyze a while loop (whl statement in Conso)"""
@@ -4272,50 +4226,9 @@ class SemanticAnalyzer:
 
         self.advance()  # Move past 'whl'
 
-        # Process opening parenthesis for condition
-        token_type, token_value, line, column = self.get_current_token()
-        if token_type != '(':
-            raise SemanticError(f"Expected '(' after 'whl', got '{token_type}'", line, column)
-
-        # Keep track of the outermost parentheses level
-        outer_paren_start = self.current_token_index
-        self.advance()  # Move past opening parenthesis
-
-        # Find the matching closing parenthesis for the outermost level
-        paren_level = 1
-
-        while paren_level > 0 and self.current_token_index < len(self.token_stream):
-            current_token = self.get_current_token()[0]
-            if current_token == '(':
-                paren_level += 1
-            elif current_token == ')':
-                paren_level -= 1
-
-            if paren_level > 0:
-                self.advance()
-
-        # Now we should be at the closing parenthesis of the condition
-        if paren_level > 0:
-            raise SemanticError("Unclosed parenthesis in 'whl' condition", line, column)
-
-        # Now at the closing parenthesis
-        outer_paren_end = self.current_token_index
-
-        # Reset to just after the opening parenthesis
-        self.current_token_index = outer_paren_start + 1
-
-        # Analyze the condition using your expression analyzer
-        # The condition is everything between the parentheses
-        expr_type = self.analyze_expression(outer_paren_end)
-
-        # --- MODIFIED CHECK: Allow 'nt' or 'bln' ---
-        if expr_type not in ['bln', 'nt']:
-            raise SemanticError(f"Condition in 'whl' statement must be of type 'bln' or 'nt', got '{expr_type}'", line, column)
-        # --- END MODIFIED CHECK ---
-
-        # Move to the closing parenthesis and advance past it
-        self.current_token_index = outer_paren_end
-        self.advance()  # Move past the closing parenthesis
+        # Process the parenthesized condition and move past its ')'
+        self._parse_paren_condition('whl', "Expected '(' after 'whl'",
+                                    "Unclosed parenthesis in 'whl' condition")
 
         # Process opening brace for while-body
         token_type, token_value, line, column = self.get_current_token()
@@ -4327,20 +4240,11 @@ class SemanticAnalyzer:
         old_in_loop = self.in_loop
         self.in_loop = True
 
-        # Existing code for creating a new scope
-        while_scope = SymbolTable(parent=self.current_scope, scope_name="while block")
-        original_scope = self.current_scope
-        self.current_scope = while_scope
-
-        # Process while-body statements
-        self.analyze_block_statements()
+        # Process while-body statements in a new scope
+        self._analyze_scoped_block(self.current_scope, "while block")
 
-        # Just before you restore the original scope, add this:
         self.in_loop = old_in_loop
 
-        # Existing code to restore scope
-        self.current_scope = original_scope
-
     def analyze_do_while_loop(self):
         """Analyze a do-while loop (d-whl statement in Conso)"""
         token_type, token_value, line, column = self.get_current_token()
@@ -4359,16 +4263,8 @@ class SemanticAnalyzer:
         old_in_loop = self.in_loop
         self.in_loop = True
 
-        # Create a new scope for the do-body
-        do_scope = SymbolTable(parent=self.current_scope, scope_name="do-while block")
-        original_scope = self.current_scope
-        self.current_scope = do_scope
-
-        # Process do-body statements
-        self.analyze_block_statements()
-
-        # Restore original scope (parent scope, not the do-while scope itself)
-        self.current_scope = original_scope
+        # Process do-body statements in a new scope
+        self._analyze_scoped_block(self.current_scope, "do-while block")
 
         # Process 'whl' keyword
         token_type, token_value, line, column = self.get_current_token()
@@ -4386,50 +4282,9 @@ class SemanticAnalyzer:
 
         self.advance()  # Move past 'whl'
 
-        # Process opening parenthesis for condition
-        token_type, token_value, line, column = self.get_current_token()
-        if token_type != '(':
-            raise SemanticError(f"Expected '(' after 'whl' in do-while, got '{token_type}'", line, column)
-
-        # Keep track of the outermost parentheses level
-        outer_paren_start = self.current_token_index
-        self.advance()  # Move past opening parenthesis
-
-        # Find the matching closing parenthesis for the outermost level
-        paren_level = 1
-
-        while paren_level > 0 and self.current_token_index < len(self.token_stream):
-            current_token = self.get_current_token()[0]
-            if current_token == '(':
-                paren_level += 1
-            elif current_token == ')':
-                paren_level -= 1
-
-            if paren_level > 0:
-                self.advance()
-
-        # Now we should be at the closing parenthesis of the condition
-        if paren_level > 0:
-            raise SemanticError("Unclosed parenthesis in 'd-whl' condition", line, column)
-
-        # Now at the closing parenthesis
-        outer_paren_end = self.current_token_index
-
-        # Reset to just after the opening parenthesis
-        self.current_token_index = outer_paren_start + 1
-
-        # Analyze the condition using your expression analyzer
-        # The condition is everything between the parentheses
-        expr_type = self.analyze_expression(outer_paren_end)
-
-        # --- MODIFIED CHECK: Allow 'nt' or 'bln' ---
-        if expr_type not in ['bln', 'nt']:
-            raise SemanticError(f"Condition in 'd-whl' statement must be of type 'bln' or 'nt', got '{expr_type}'", line, column)
-        # --- END MODIFIED CHECK ---
-
-        # Move to the closing parenthesis and advance past it
-        self.current_token_index = outer_paren_end
-        self.advance()  # Move past the closing parenthesis
+        # Process the parenthesized condition and move past its ')'
+        self._parse_paren_condition('d-whl', "Expected '(' after 'whl' in do-while",
+                                    "Unclosed parenthesis in 'd-whl' condition")
 
         # FOR DO-WHILE: Look for semicolon, not opening brace
         token_type, token_value, line, column = self.get_current_token()
@@ -4460,7 +4315,7 @@ class SemanticAnalyzer:
         
         # Check if it's an increment or decrement operator
         token_type, token_value, line, column = self.get_current_token()
-        if token_type not in ['++', '--']:
+        if token_type not in _INCDEC_OPERATORS:
             raise SemanticError(f"Expected increment/decrement operator, got '{token_type}'", line, column)
         
         self.advance()  # Move past ++ or --
@@ -4483,7 +4338,8 @@ class SemanticAnalyzer:
         if token_type != 'prnt':
             raise SemanticError(f"Expected 'prnt' keyword, got '{token_type}'", line, column)
         
-        print(f"Analyzing print statement at line {line}, column {column}")  # Debug output
+        if _DEBUG:
+            print(f"Analyzing print statement at line {line}, column {column}")  # Debug output
         
         self.advance()  # Move past 'prnt'
         
@@ -4508,48 +4364,23 @@ class SemanticAnalyzer:
         
         # Process expressions until closing parenthesis
         while True:
-            # Mark the start of the current print argument
+            # Mark the start of the current print argument and find its end
+            # (comma or closing parenthesis)
             expr_start = self.current_token_index
-            
-            # Find the end of this expression (comma or closing parenthesis)
-            paren_level = 0
-            while self.current_token_index < len(self.token_stream):
-                token_type = self.get_current_token()[0]
-                
-                if token_type == '(':
-                    paren_level += 1
-                elif token_type == ')':
-                    if paren_level == 0:
-                        # This is the closing parenthesis of the print statement
-                        break
-                    paren_level -= 1
-                elif token_type == ',' and paren_level == 0:
-                    # This is a comma separating expressions
-                    break
-                
-                self.advance()
-            
-            # Save the end position
-            expr_end = self.current_token_index
-            
-            # Reset to start of expression for analysis
-            self.current_token_index = expr_start
+            expr_end = self._argument_end(expr_start, track_brackets=False)
             
             # Get the tokens being analyzed for debug
-            expr_tokens = self.token_stream[expr_start:expr_end]
-            expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
-            print(f"Print expression tokens: {expr_str}")  # Debug output
-            
-            # Analyze the expression using our standard expression analyzer
-            try:
-                # The standard analyze_expression will properly enforce all type constraints
-                # including arithmetic, relational, logical, and string operations
-                expr_type = self.analyze_expression(expr_end)
+            if _DEBUG:
+                expr_tokens = self.token_stream[expr_start:expr_end]
+                expr_str = " ".join([f"{t[0]}('{t[1]}')" for t in expr_tokens])
+                print(f"Print expression tokens: {expr_str}")  # Debug output
+            
+            # Analyze the expression using our standard expression analyzer.
+            # It enforces all type constraints, including arithmetic,
+            # relational, logical, and string operations
+            expr_type = self.analyze_expression(expr_end)
+            if _DEBUG:
                 print(f"Print expression type result: {expr_type}")  # Debug output
-            except SemanticError as e:
-                print(f"Semantic error in print expression: {e}")  # Debug output
-                # Re-raise the error
-                raise e
             
             # Move to the end of this expression
             self.current_token_index = expr_end
@@ -4574,7 +4405,8 @@ class SemanticAnalyzer:
             raise SemanticError(f"Expected ';' after print statement", line, column)
         
         self.advance()  # Skip ';'
-        print("Print statement analysis completed successfully")  # Debug output
+        if _DEBUG:
+            print("Print statement analysis completed successfully")  # Debug output
 
     def analyze_break_statement(self):
         """Analyze a break statement"""
@@ -4614,13 +4446,13 @@ class SemanticAnalyzer:
         """Peek at the next token without advancing"""
         if self.current_token_index + 1 < len(self.token_stream):
             return self.token_stream[self.current_token_index + 1]
-        return None, None, None, None
+        return _NO_TOKEN
 
     def get_current_token(self):
         """Get the current token tuple (type, value, line, column)"""
         if self.current_token_index < len(self.token_stream):
             return self.token_stream[self.current_token_index]
-        return None, None, None, None
+        return _NO_TOKEN
     
     def debug_print_scope_hierarchy(self, scope=None, indent=0):
         if scope is None: